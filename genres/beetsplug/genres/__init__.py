@@ -3,10 +3,13 @@
 #  License: See LICENSE.txt
 
 import os
+from beets.library import Library
 from beets.plugins import BeetsPlugin
 from confuse import ConfigSource, load_yaml
 
 from beetsplug.genres.command import GenresCommand
+from beetsplug.genres.index import GenreIndex, GenresQuery
+from beetsplug.genres.tree import GenreTree, load_tree
 
 
 class GenresPlugin(BeetsPlugin):
@@ -17,6 +20,27 @@ class GenresPlugin(BeetsPlugin):
         config_file_path = os.path.join(os.path.dirname(__file__), self._default_plugin_config_file_name_)
         source = ConfigSource(load_yaml(config_file_path) or {}, config_file_path)
         self.config.add(source)
+        self.tree: GenreTree | None = None
+        self.index: GenreIndex | None = None
+
+        if self.config['index'].get(bool):
+            genres_field = self.config['genres_field'].as_str()
+            self.index = GenreIndex(self.config['field'].as_str(), genres_field)
+            GenresQuery.configure(self.index, self.genre_tree)
+            self.item_queries = {genres_field: GenresQuery}
+            self.register_listener('library_opened', self.library_opened)
+            self.register_listener('cli_exit', self.store_index)
 
     def commands(self):
         return [GenresCommand(self.config)]
+
+    def genre_tree(self) -> GenreTree:
+        if self.tree is None:
+            self.tree = load_tree(self.config['tree'].as_str(), self.config['tree_cache'].get(bool))
+        return self.tree
+
+    def library_opened(self, lib: Library):
+        self.index.library = lib
+
+    def store_index(self, **_):
+        self.index.flush()
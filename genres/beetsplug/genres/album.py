@@ -0,0 +1,146 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from collections import Counter
+from typing import Iterator
+
+from beets.dbcore import types
+from beets.dbcore.query import Query
+from beets.library import Library, Item, Album
+from beets.ui import UserError
+
+from beetsplug.genres.fields import selection, value_sql, write_values
+from beetsplug.genres.timing import timings
+from beetsplug.genres.tree import GenreTree
+
+# Joins track values in group_concat; not expected inside a genre
+_separator = '\x1f'
+
+
+def split_genres(value: str | None, field_type: types.Type) -> list[str]:
+    """Genres in a stored `genres` value, parsed by the field's type or split on ';'"""
+    if not value:
+        return []
+    parsed = field_type.parse(value)
+    if isinstance(parsed, str):
+        parsed = parsed.split(';')
+    return [genre.strip() for genre in parsed if genre.strip()]
+
+
+def ensure_album_index(library: Library):
+    """Index items by album so albums are read in order without sorting the library"""
+    with library.transaction() as tx:
+        for index in tx.query('PRAGMA index_list(items)'):
+            columns = [row[2] for row in tx.query('PRAGMA index_info({})'.format(index[1]))]
+            if columns[:1] == ['album_id']:
+                return
+        tx.mutate('CREATE INDEX IF NOT EXISTS genres_items_album ON items (album_id)')
+
+
+class AlbumGenres:
+    """album_genre and album_genres from the genres of an album's tracks
+
+    `mode` is how tracks agree on album_genre: identical (every track the
+    same), threshold (the most common genre on at least `threshold` of the
+    tracks) or tree (the most specific genre in `tree` containing them all).
+    Albums that do not agree get `various`, or nothing if that is empty.
+    """
+    modes = ('identical', 'threshold', 'tree')
+
+    def __init__(self, mode: str = 'threshold', threshold: float = 0.75, various: str = 'Various',
+                 tree: GenreTree | None = None):
+        if mode not in self.modes:
+            raise UserError('unknown album mode {}, expected one of: {}'.format(mode, ', '.join(self.modes)))
+        if mode == 'tree' and tree is None:
+            raise UserError('album mode tree needs a genre tree')
+        self.mode = mode
+        self.threshold = threshold
+        self.various = various or None
+        self.tree = tree
+
+    def album_genre(self, track_genres: list[str]) -> str | None:
+        """album_genre for the `genre` of each track ('' when missing)"""
+        counts = Counter(genre for genre in track_genres if genre)
+        if not counts:
+            return None
+        top, top_count = counts.most_common(1)[0]
+        if self.mode == 'identical':
+            return top if len(counts) == 1 and top_count == len(track_genres) else self.various
+        if self.mode == 'threshold':
+            return top if top_count >= self.threshold * len(track_genres) else self.various
+        # Tree: tracks without a genre do not count against the others
+        if len(counts) == 1:
+            return top
+        return self.tree.common_ancestor(counts) or self.various
+
+    @staticmethod
+    def album_genres(track_genres: list[str], track_genre_lists: list[list[str]]) -> list[str]:
+        """Every genre of the tracks, most common first
+
+        A track without `genres` counts with its `genre`.
+        """
+        counts = Counter()
+        for genre, genres in zip(track_genres, track_genre_lists):
+            counts.update(genres or ([genre] if genre else []))
+        return [genre for genre, _ in counts.most_common()]
+
+
+def album_tracks(library: Library, query: Query, genre_field: str, genres_field: str,
+                 chunk_size: int = 1000) -> Iterator[list[tuple[int, list[str], list[list[str]]]]]:
+    """(album id, genre of each track, genres of each track) for matching albums
+
+    One grouped query per `chunk_size` albums, walking the items index on
+    album_id, so memory depends on the chunk rather than the library. The
+    albums of a chunk are picked in a subquery of their own, so the album
+    query cannot see the tracks being grouped and every track counts.
+    """
+    genre_sql, genre_values = value_sql(genre_field)
+    genres_sql, genres_values = value_sql(genres_field)
+    genres_type = Item._type(genres_field)
+    with library.transaction() as tx, selection(tx, library, query, Album) as (where, subvals):
+        sql = ("SELECT chunk.id, group_concat(coalesce({g}, ''), ?), group_concat(coalesce({gs}, ''), ?)"
+               ' FROM (SELECT albums.id FROM albums WHERE albums.id > ? AND ({w}) ORDER BY albums.id LIMIT ?)'
+               ' AS chunk LEFT JOIN items ON items.album_id = chunk.id'
+               ' GROUP BY chunk.id ORDER BY chunk.id').format(g=genre_sql, gs=genres_sql, w=where)
+        last_id = 0
+        while True:
+            with timings.timed('query'):
+                rows = tx.query(sql, genre_values + (_separator,) + genres_values + (_separator, last_id)
+                                + tuple(subvals) + (chunk_size,))
+            if not rows:
+                return
+            yield [
+                (album_id, (genres or '').split(_separator),
+                 [split_genres(value, genres_type) for value in (genre_lists or '').split(_separator)])
+                for album_id, genres, genre_lists in rows
+            ]
+            last_id = rows[-1][0]
+
+
+def store_album_genres(library: Library, query: Query, album_genres: AlbumGenres,
+                       fields: tuple[str, str, str, str], chunk_size: int = 1000) -> Counter:
+    """Set album_genre and album_genres on matching albums, one executemany per field and chunk
+
+    `fields` are the track genre and genres fields, then the album genre
+    and genres fields. Returns counts of `albums` seen and `album_genre`
+    and `various` values set.
+    """
+    genre_field, genres_field, album_field, album_genres_field = fields
+    ensure_album_index(library)
+    summary = Counter(albums=0, album_genre=0, various=0)
+    for chunk in album_tracks(library, query, genre_field, genres_field, chunk_size):
+        genre_rows, genres_rows = [], []
+        for album_id, track_genres, track_genre_lists in chunk:
+            genre = album_genres.album_genre(track_genres)
+            if genre is not None:
+                genre_rows.append((genre, album_id))
+                summary['various' if genre == album_genres.various else 'album_genre'] += 1
+            merged = album_genres.album_genres(track_genres, track_genre_lists)
+            if merged:
+                genres_rows.append(('; '.join(merged), album_id))
+        summary['albums'] += len(chunk)
+        with timings.timed('store'), library.transaction() as tx:
+            write_values(tx, album_field, genre_rows, Album)
+            write_values(tx, album_genres_field, genres_rows, Album)
+    return summary
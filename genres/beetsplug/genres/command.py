@@ -4,9 +4,15 @@
 
 from optparse import OptionParser
 
-from beets.library import Library
-from beets.ui import Subcommand, decargs
+from beets.library import Library, Item, Album, parse_query_parts
+from beets.ui import Subcommand, UserError, decargs
 from beetsplug.genres import common
+from beetsplug.genres.album import AlbumGenres, store_album_genres
+from beetsplug.genres.exchange import export_genres, import_genres, key_columns
+from beetsplug.genres.fields import copy_field
+from beetsplug.genres.index import GenreIndex
+from beetsplug.genres.timing import timings, profiled
+from beetsplug.genres.tree import GenreTree, load_tree
 from confuse import Subview
 
 
@@ -16,11 +22,32 @@ class GenresCommand(Subcommand):
     query = None
     parser: OptionParser = None
 
+    actions = ('backup', 'restore', 'export', 'import', 'album', 'tree', 'index', 'count')
+
+    cfg_field = 'genre'
+    cfg_backup_field = 'genre_bak'
+    cfg_genres_field = 'genres'
+    cfg_chunk = 1000
+    cfg_key = 'id'
+    cfg_workers = 1
+    cfg_album_field = 'album_genre'
+    cfg_album_genres_field = 'album_genres'
+    cfg_album_mode = 'threshold'
+    cfg_album_threshold = 0.75
+    cfg_album_various = 'Various'
+    cfg_index = True
+    cfg_tree = ''
+    cfg_tree_cache = True
+    cfg_profile: str | None = None
+
     def __init__(self, cfg):
         self.config = cfg
 
         self.parser = OptionParser(
-            usage='beet {plg} [options] [QUERY...]'.format(
+            usage=(
+                'beet {plg} [options] backup|restore [QUERY...] | export FILE [QUERY...]'
+                ' | import FILE | album [QUERY...] | tree GENRE... | index | count [QUERY...]'
+            ).format(
                 plg=common.plg_ns['__PLUGIN_NAME__']
             ))
 
@@ -30,6 +57,26 @@ class GenresCommand(Subcommand):
             help=u'show plugin version'
         )
 
+        self.parser.add_option(
+            '-k', '--key',
+            type='choice', choices=list(key_columns),
+            action='store', dest='key', default=self.cfg_key,
+            help=u'import: match entries to items by {}'.format(', '.join(key_columns))
+        )
+
+        self.parser.add_option(
+            '-w', '--workers',
+            type='int',
+            action='store', dest='workers', default=None,
+            help=u'import: parse and check the file on this many processes'
+        )
+
+        self.parser.add_option(
+            '--profile',
+            action='store', dest='profile', default=None, metavar='FILE',
+            help=u'write step timings (FILE.json) or a cProfile dump (any other name) and show a summary'
+        )
+
         super(GenresCommand, self).__init__(
             parser=self.parser,
             name=common.plg_ns['__PLUGIN_NAME__'],
@@ -46,10 +93,111 @@ class GenresCommand(Subcommand):
             self.show_version_information()
             return
 
-        self.handle_main_task()
+        self.cfg_field = self.config['field'].as_str()
+        self.cfg_backup_field = self.config['backup_field'].as_str()
+        self.cfg_genres_field = self.config['genres_field'].as_str()
+        self.cfg_chunk = self.config['exchange_chunk'].get(int)
+        self.cfg_key = options.key
+        self.cfg_workers = options.workers if options.workers is not None else self.config['workers'].get(int)
+        self.cfg_album_field = self.config['album_field'].as_str()
+        self.cfg_album_genres_field = self.config['album_genres_field'].as_str()
+        self.cfg_album_mode = self.config['album_mode'].as_str()
+        self.cfg_album_threshold = self.config['album_threshold'].as_number()
+        self.cfg_album_various = self.config['album_various'].as_str()
+        self.cfg_index = self.config['index'].get(bool)
+        self.cfg_tree = self.config['tree'].as_str()
+        self.cfg_tree_cache = self.config['tree_cache'].get(bool)
+        self.cfg_profile = options.profile
+        timings.reset()
+        profiled(self.cfg_profile, self.handle_main_task)
+        self.show_timings()
 
+    @timings.timer('main')
     def handle_main_task(self):
-        self._say("Your journey starts here...", log_only=False)
+        if not self.query or self.query[0] not in self.actions:
+            raise UserError('expected one of: {}'.format(', '.join(self.actions)))
+        match self.query:
+            case ['export', path, *query]:
+                self.export(path, parse_query_parts(query, Item)[0])
+            case ['import', path]:
+                self.import_file(path)
+            case ['album', *query]:
+                self.album(parse_query_parts(query, Album)[0])
+            case ['tree', *genres] if genres:
+                self.show_tree(genres)
+            case ['index']:
+                self.rebuild_index()
+            case ['count', *query]:
+                self.count(parse_query_parts(query, Item)[0] if query else None)
+            case ['backup' | 'restore' as action, *query]:
+                getattr(self, action)(parse_query_parts(query, Item)[0])
+            case _:
+                raise UserError(self.parser.get_usage())
+
+    def backup(self, query):
+        count = copy_field(self.lib, query, self.cfg_field, self.cfg_backup_field)
+        self._say('Backed up {} to {} on {} item(s)'.format(self.cfg_field, self.cfg_backup_field, count),
+                  log_only=False)
+
+    def restore(self, query):
+        count = copy_field(self.lib, query, self.cfg_backup_field, self.cfg_field)
+        self._say('Restored {} from {} on {} item(s)'.format(self.cfg_field, self.cfg_backup_field, count),
+                  log_only=False)
+        if self.cfg_index and count:
+            self.rebuild_index()
+
+    def export(self, path: str, query):
+        count = export_genres(self.lib, query, path, [self.cfg_field, self.cfg_genres_field], self.cfg_chunk)
+        self._say('Exported {} item(s) to {}'.format(count, path), log_only=False)
+
+    def import_file(self, path: str):
+        summary, errors = import_genres(self.lib, path, [self.cfg_field, self.cfg_genres_field],
+                                        self.cfg_key, self.cfg_workers, self.cfg_chunk)
+        self._say('Imported {stored} item(s), {unmatched} not in the library, {invalid} invalid line(s)'.format(
+            **summary), log_only=False)
+        for error in errors:
+            self._say('{}: {}'.format(path, error), log_only=False, is_error=True)
+        if self.cfg_index and summary['stored']:
+            self.rebuild_index()
+
+    def rebuild_index(self):
+        # Bulk writes bypass the library events that keep the index current
+        rows = GenreIndex(self.cfg_field, self.cfg_genres_field).rebuild(self.lib)
+        self._say('Indexed {} item genre(s)'.format(rows), log_only=False)
+
+    def count(self, query):
+        GenreIndex(self.cfg_field, self.cfg_genres_field).ensure(self.lib)
+        for genre, count in GenreIndex.counts(self.lib, query):
+            print('{: >8} {}'.format(count, genre))
+
+    def album(self, query):
+        album_genres = AlbumGenres(
+            mode=self.cfg_album_mode,
+            threshold=self.cfg_album_threshold,
+            various=self.cfg_album_various,
+            tree=self.genre_tree() if self.cfg_album_mode == 'tree' else None,
+        )
+        fields = (self.cfg_field, self.cfg_genres_field, self.cfg_album_field, self.cfg_album_genres_field)
+        summary = store_album_genres(self.lib, query, album_genres, fields, self.cfg_chunk)
+        self._say('{albums} album(s): {album_genre} with a genre, {various} various'.format(**summary),
+                  log_only=False)
+
+    def genre_tree(self) -> GenreTree:
+        with timings.timed('tree'):
+            return load_tree(self.cfg_tree, self.cfg_tree_cache)
+
+    def show_tree(self, genres: list[str]):
+        tree = self.genre_tree()
+        for genre in genres:
+            if genre in tree:
+                self._say(' < '.join([tree.name(genre)] + tree.ancestors(genre)), log_only=False)
+            else:
+                self._say('{}: not in the tree'.format(genre), log_only=False)
+        self._say('Common: {}'.format(tree.common_ancestor(genres) or '(none)'), log_only=False)
+
+    def show_timings(self):
+        for line in timings.summary():
+            self._say(line, log_only=not self.cfg_profile)
 
     def show_version_information(self):
         self._say("{pt}({pn}) plugin for Beets: v{ver}".format(
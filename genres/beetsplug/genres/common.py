@@ -3,13 +3,11 @@
 #  License: See LICENSE.txt
 
 import logging
-import os
+
+from beetsplug.genres import about
 
 # Get values as: plg_ns['__PLUGIN_NAME__']
-plg_ns = {}
-about_path = os.path.join(os.path.dirname(__file__), u'about.py')
-with open(about_path) as about_file:
-    exec(about_file.read(), plg_ns)
+plg_ns = vars(about)
 
 __logger__ = logging.getLogger('beets.{plg}'.format(
     plg=plg_ns['__PLUGIN_NAME__']))
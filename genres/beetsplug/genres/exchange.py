@@ -0,0 +1,193 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from beets.dbcore.query import Query
+from beets.library import Item, Library
+from beets.ui import UserError
+
+from beetsplug.genres.fields import selection, value_sql, write_values
+from beetsplug.genres.timing import timings
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Columns of the items table each key is looked up in
+key_columns = {'id': 'id', 'acoustid': 'acoustid_id', 'path': 'path'}
+
+Entry = tuple[object, dict[str, str]]
+
+
+def _path_text(path: bytes | str | None) -> str | None:
+    # Paths are stored as bytes; surrogateescape keeps undecodable names intact
+    return os.fsdecode(path) if path is not None else None
+
+
+def export_genres(library: Library, query: Query, path: str, fields: list[str], chunk_size: int = 1000) -> int:
+    """Write `fields` of matching items to `path` as JSON Lines
+
+    Rows are read `chunk_size` at a time in id order and written as they
+    come, so memory use does not grow with the library. Values are written
+    as beets reads them, so list fields (`genres`) become JSON lists.
+    Returns the number of items written.
+    """
+    values = [value_sql(field) for field in fields]
+    field_types = [Item._type(field) for field in fields]
+    columns = ', '.join(sql for sql, _ in values)
+    column_values = tuple(value for _, field_values in values for value in field_values)
+    count = 0
+    with open(path, 'w', encoding='utf-8', errors='surrogateescape') as export_file, \
+            library.transaction() as tx, selection(tx, library, query) as (where, subvals):
+        sql = 'SELECT items.id, items.acoustid_id, items.path, {c} FROM items' \
+              ' WHERE ({w}) AND items.id > ? ORDER BY items.id LIMIT ?'.format(c=columns, w=where)
+        last_id = 0
+        while True:
+            with timings.timed('query'):
+                rows = tx.query(sql, column_values + tuple(subvals) + (last_id, chunk_size))
+            if not rows:
+                return count
+            for row in rows:
+                entry = {'id': row[0], 'acoustid': row[1] or None, 'path': _path_text(row[2])}
+                entry.update(
+                    (field, None if value is None else field_type.from_sql(value))
+                    for field, field_type, value in zip(fields, field_types, row[3:])
+                )
+                export_file.write(json.dumps(entry, ensure_ascii=False))
+                export_file.write('\n')
+            count += len(rows)
+            last_id = rows[-1][0]
+
+
+def parse_lines(lines: list[tuple[int, str]], key: str, fields: list[str]) -> tuple[list[Entry], list[str]]:
+    """Entries (key value, {field: value}) and errors for numbered lines of an export
+
+    Fields that are missing or null are left out of the entry. List fields
+    (`genres`) take a list of strings, or a string in beets' own format;
+    values are returned as stored in the database. Runs in worker
+    processes, so it only takes and returns plain data.
+    """
+    field_types = {field: Item._type(field) for field in fields}
+    entries, errors = [], []
+    for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            key_value = data[key]
+            if key == 'id':
+                key_value = int(key_value)
+            elif key == 'path':
+                key_value = os.fsencode(key_value)
+            elif not isinstance(key_value, str):
+                raise TypeError('{} is not a string'.format(key))
+            values = {field: data[field] for field in fields if data.get(field) is not None}
+            for field, value in values.items():
+                if isinstance(value, list) and field_types[field].model_type is list \
+                        and all(isinstance(part, str) for part in value):
+                    values[field] = field_types[field].to_sql(value)
+                elif not isinstance(value, str):
+                    raise TypeError('{} must be a string{}'.format(
+                        field, ' or a list of strings' if field_types[field].model_type is list else ''))
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            errors.append('line {}: {}'.format(line_number, error))
+            continue
+        if values:
+            entries.append((key_value, values))
+    return entries, errors
+
+
+def parallel_map(func: Callable[..., R], chunks: Iterable[T], workers: int, *args) -> Iterator[R]:
+    """func(chunk, *args) for each chunk, in order, on up to `workers` processes
+
+    At most two chunks per worker are queued, so a large file is never
+    read ahead in full.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(chunk, *args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[list[tuple[int, str]]]:
+    with open(path, encoding='utf-8', errors='surrogateescape') as import_file:
+        numbered = enumerate(import_file, 1)
+        while chunk := list(islice(numbered, chunk_size)):
+            yield chunk
+
+
+class KeyIndex:
+    """Item ids by id, acoustid or path, each built with one query on first use
+
+    A key can match several items (the same recording on an album and a
+    compilation shares its acoustid), so each maps to a list of ids.
+    """
+
+    def __init__(self, library: Library):
+        self.library = library
+        self.indexes: dict[str, dict] = {}
+
+    def get(self, key: str) -> dict:
+        if key not in self.indexes:
+            column = key_columns[key]
+            with timings.timed('index'), self.library.transaction() as tx:
+                rows = tx.query('SELECT {c}, id FROM items WHERE {c} IS NOT NULL AND {c} != ?'.format(c=column),
+                                (0 if key == 'id' else '',))
+            index: dict[object, list[int]] = {}
+            for value, item_id in rows:
+                index.setdefault(value, []).append(item_id)
+            self.indexes[key] = index
+        return self.indexes[key]
+
+    def resolve(self, key: str, entries: list[Entry]) -> Iterator[tuple[list[int], dict[str, str]]]:
+        """(item ids, values) for each entry matching at least one item"""
+        index = self.get(key)
+        for key_value, values in entries:
+            item_ids = index.get(key_value)
+            if item_ids:
+                yield item_ids, values
+
+
+def import_genres(library: Library, path: str, fields: list[str], key: str = 'id', workers: int = 1,
+                  chunk_size: int = 1000) -> tuple[Counter, list[str]]:
+    """Store `fields` from an export, `chunk_size` lines per transaction
+
+    Lines are parsed and checked on `workers` processes; an entry is
+    stored on every item its key matches. Returns counts of `stored`
+    items, `unmatched` entries and `invalid` lines, and the first few
+    errors.
+    """
+    if key not in key_columns:
+        raise UserError('unknown key {}, expected one of: {}'.format(key, ', '.join(key_columns)))
+    index = KeyIndex(library)
+    summary, errors = Counter(stored=0, unmatched=0, invalid=0), []
+    for entries, chunk_errors in parallel_map(parse_lines, read_chunks(path, chunk_size), workers, key, fields):
+        summary['invalid'] += len(chunk_errors)
+        errors.extend(chunk_errors[:10 - len(errors)])
+        rows = {field: [] for field in fields}
+        matched = 0
+        for item_ids, values in index.resolve(key, entries):
+            matched += 1
+            summary['stored'] += len(item_ids)
+            for field, value in values.items():
+                rows[field].extend((value, item_id) for item_id in item_ids)
+        summary['unmatched'] += len(entries) - matched
+        with timings.timed('store'), library.transaction() as tx:
+            for field, field_rows in rows.items():
+                if field_rows:
+                    write_values(tx, field, field_rows)
+    return summary, errors
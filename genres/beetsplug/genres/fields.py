@@ -0,0 +1,94 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Sequence
+
+from beets.dbcore.db import Transaction
+from beets.dbcore.query import Query
+from beets.library import Library, Item, Album
+
+selection_table = 'genres_selection'
+
+
+def is_fixed(field: str, model: type[Item | Album] = Item) -> bool:
+    """Whether `field` is a column of the model's table rather than a flexible attribute"""
+    return field in model._fields
+
+
+def value_sql(field: str, model: type[Item | Album] = Item) -> tuple[str, tuple]:
+    """SQL expression (and its values) for a field, inside a statement on the model's table"""
+    if is_fixed(field, model):
+        return '{}.{}'.format(model._table, field), ()
+    return '(SELECT value FROM {f} WHERE entity_id = {t}.id AND key = ?)'.format(
+        f=model._flex_table, t=model._table), (field,)
+
+
+def write_values(tx: Transaction, field: str, rows: Iterable[tuple[str, int]], model: type[Item | Album] = Item):
+    """Store (value, id) rows in a field with one executemany"""
+    if is_fixed(field, model):
+        tx.mutate_many('UPDATE {} SET {} = ? WHERE id = ?'.format(model._table, field), rows)
+    else:
+        # Flexible attribute tables replace on conflict
+        tx.mutate_many(
+            'INSERT INTO {} (value, entity_id, key) VALUES (?, ?, ?)'.format(model._flex_table),
+            ((value, entity_id, field) for value, entity_id in rows)
+        )
+
+
+@contextmanager
+def selection(tx: Transaction, library: Library, query: Query,
+              model: type[Item | Album] = Item) -> Iterator[tuple[str, Sequence]]:
+    """WHERE clause (and values) for the rows `query` matches
+
+    Queries on fields of the related table (album fields of an item)
+    get beets' join, inside a subquery so their columns cannot bind to an
+    outer statement. Queries SQLite cannot run (flexible attributes,
+    regular expressions) are matched in Python once and the ids put in a
+    temporary table.
+    """
+    where, subvals = query.clause()
+    if where is not None:
+        if query.field_names & model.other_db_fields:
+            where = '{t}.id IN (SELECT {t}.id FROM {t} {j} WHERE {w})'.format(
+                t=model._table, j=model.relation_join, w=where)
+        yield where, subvals
+        return
+    tx.script(
+        'CREATE TEMPORARY TABLE IF NOT EXISTS {t} (id INTEGER PRIMARY KEY);'
+        'DELETE FROM {t};'.format(t=selection_table)
+    )
+    matches = library.albums(query) if model is Album else library.items(query)
+    tx.mutate_many('INSERT INTO {} (id) VALUES (?)'.format(selection_table), ((obj.id,) for obj in matches))
+    try:
+        yield '{}.id IN (SELECT id FROM {})'.format(model._table, selection_table), ()
+    finally:
+        tx.script('DROP TABLE IF EXISTS temp.{}'.format(selection_table))
+
+
+def copy_field(library: Library, query: Query, source: str, target: str) -> int:
+    """Copy `source` to `target` on every matching item with one statement
+
+    Items without a `source` value are left alone. Returns the number of
+    items written.
+    """
+    source_sql, source_values = value_sql(source)
+    with library.transaction() as tx:
+        with selection(tx, library, query) as (where, subvals):
+            before = tx.query('SELECT total_changes()')[0][0]
+            if is_fixed(target):
+                tx.mutate(
+                    'UPDATE items SET {t} = {s} WHERE ({w}) AND {s} IS NOT NULL'.format(
+                        t=target, s=source_sql, w=where),
+                    source_values + tuple(subvals) + source_values
+                )
+            else:
+                # item_attributes replaces on conflict, so this also overwrites
+                tx.mutate(
+                    'INSERT INTO item_attributes (entity_id, key, value)'
+                    ' SELECT items.id, ?, {s} FROM items WHERE ({w}) AND {s} IS NOT NULL'.format(
+                        s=source_sql, w=where),
+                    (target,) + source_values + tuple(subvals) + source_values
+                )
+            return tx.query('SELECT total_changes()')[0][0] - before
@@ -0,0 +1,256 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from typing import Callable, Iterable
+
+from beets.dbcore import types
+from beets.dbcore.db import Transaction
+from beets.dbcore.query import FieldQuery, Query
+from beets.library import Library, Item
+
+from beetsplug.genres import common
+from beetsplug.genres.album import split_genres
+from beetsplug.genres.fields import is_fixed, selection, value_sql
+from beetsplug.genres.timing import timings
+from beetsplug.genres.tree import GenreTree
+
+
+class GenreIndex:
+    """Every genre of every item, one row per (item, genre), in side tables
+
+    Genre names live once in a dictionary table (matched ignoring case)
+    and `item_genres` holds id pairs, keyed by genre first, so "items
+    tagged X" and counts per genre are index lookups instead of scans of
+    a delimited string. Triggers note every item whose genre fields are
+    written, by this plugin or anything else, and `flush` re-indexes
+    them. A library that was never indexed (or indexed for other fields)
+    is indexed in full on first use (`ensure`).
+    """
+    table = 'item_genres'
+    dictionary_table = 'genres_dictionary'
+    changed_table = 'item_genres_changed'
+    state_table = 'item_genres_state'
+
+    def __init__(self, genre_field: str = 'genre', genres_field: str = 'genres', batch_size: int = 500):
+        self.genre_field = genre_field
+        self.genres_field = genres_field
+        self.batch_size = max(batch_size, 1)
+        self.library: Library | None = None
+        # Whether the index was built for these fields, looked up once per process
+        self.built: bool | None = None
+        self._genres_type: types.Type | None = None
+
+    @property
+    def genres_type(self) -> types.Type:
+        # Looked up on first use, once every plugin has registered its types
+        if self._genres_type is None:
+            self._genres_type = Item._type(self.genres_field)
+        return self._genres_type
+
+    @property
+    def fields(self) -> str:
+        return '{} {}'.format(self.genre_field, self.genres_field)
+
+    @classmethod
+    def create_table(cls, library: Library):
+        with library.transaction() as tx:
+            tx.script(
+                'CREATE TABLE IF NOT EXISTS {d} ('
+                ' id INTEGER PRIMARY KEY,'
+                ' name TEXT NOT NULL UNIQUE COLLATE NOCASE);'
+                'CREATE TABLE IF NOT EXISTS {t} ('
+                ' genre_id INTEGER NOT NULL,'
+                ' item_id INTEGER NOT NULL,'
+                ' PRIMARY KEY (genre_id, item_id)) WITHOUT ROWID;'
+                'CREATE INDEX IF NOT EXISTS {t}_by_item ON {t} (item_id);'
+                'CREATE TABLE IF NOT EXISTS {c} (item_id INTEGER PRIMARY KEY);'
+                'CREATE TABLE IF NOT EXISTS {s} (fields TEXT NOT NULL);'.format(
+                    d=cls.dictionary_table, t=cls.table, c=cls.changed_table, s=cls.state_table)
+            )
+
+    def create_triggers(self, library: Library):
+        """Note the items whose genre fields are written, replacing triggers for other fields"""
+        note = 'BEGIN INSERT OR IGNORE INTO {} (item_id) VALUES ({{}}); END;'.format(self.changed_table)
+        columns = [field for field in (self.genre_field, self.genres_field) if is_fixed(field)]
+        keys = ', '.join("'{}'".format(field) for field in (self.genre_field, self.genres_field)
+                         if not is_fixed(field))
+        triggers = {
+            'insert': 'AFTER INSERT ON items ' + note.format('NEW.id'),
+            'delete': 'AFTER DELETE ON items ' + note.format('OLD.id'),
+        }
+        if columns:
+            triggers['update'] = 'AFTER UPDATE OF {} ON items '.format(', '.join(columns)) + note.format('NEW.id')
+        if keys:
+            for event, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+                triggers['flex_' + event] = 'AFTER {e} ON item_attributes WHEN {r}.key IN ({k}) '.format(
+                    e=event.upper(), r=row, k=keys) + note.format(row + '.entity_id')
+        names = ['insert', 'delete', 'update', 'flex_insert', 'flex_update', 'flex_delete']
+        with library.transaction() as tx:
+            tx.script(''.join(
+                'DROP TRIGGER IF EXISTS {t}_{n};'.format(t=self.table, n=name) for name in names
+            ) + ''.join(
+                'CREATE TRIGGER {t}_{n} {sql}'.format(t=self.table, n=name, sql=sql) for name, sql in triggers.items()
+            ))
+
+    def is_built(self, library: Library) -> bool:
+        """Whether the index was built for these fields (and so is kept up to date by its triggers)"""
+        if self.built is None:
+            self.create_table(library)
+            with library.transaction() as tx:
+                rows = tx.query('SELECT fields FROM {}'.format(self.state_table))
+            self.built = bool(rows) and rows[0][0] == self.fields
+        return self.built
+
+    def ensure(self, library: Library) -> bool:
+        """Index the library in full unless it already is; True if it had to"""
+        if self.is_built(library):
+            return False
+        common.say('Indexing item genres, once for this library', log_only=False)
+        self.rebuild(library)
+        return True
+
+    def item_genres(self, genre: str | None, genres: str | list[str] | None) -> list[str]:
+        """Genres of an item from its stored (or parsed) values; `genre` when `genres` is empty"""
+        if not isinstance(genres, list):
+            genres = split_genres(genres, self.genres_type)
+        names = [name.strip() for name in genres if name.strip()] or [(genre or '').strip()]
+        # Distinct, ignoring case like the dictionary
+        distinct = {}
+        for name in names:
+            if name:
+                distinct.setdefault(name.lower(), name)
+        return list(distinct.values())
+
+    def _select_sql(self, where: str) -> tuple[str, tuple]:
+        genre_sql, genre_values = value_sql(self.genre_field)
+        genres_sql, genres_values = value_sql(self.genres_field)
+        return 'SELECT items.id, {g}, {gs} FROM items WHERE {w}'.format(
+            g=genre_sql, gs=genres_sql, w=where), genre_values + genres_values
+
+    def _write(self, tx: Transaction, rows: Iterable[tuple[int, str | None, str | None]]):
+        pairs = [(item_id, name) for item_id, genre, genres in rows for name in self.item_genres(genre, genres)]
+        if not pairs:
+            return
+        spellings = {}
+        for _, name in pairs:
+            spellings.setdefault(name.lower(), name)
+        # New genres keep the first spelling seen
+        tx.mutate_many(
+            'INSERT OR IGNORE INTO {} (name) VALUES (?)'.format(self.dictionary_table),
+            ((name,) for name in spellings.values())
+        )
+        ids = {name.lower(): genre_id for genre_id, name in
+               tx.query('SELECT id, name FROM {}'.format(self.dictionary_table))}
+        tx.mutate_many(
+            'INSERT OR IGNORE INTO {} (genre_id, item_id) VALUES (?, ?)'.format(self.table),
+            ((ids[name.lower()], item_id) for item_id, name in pairs)
+        )
+
+    def rebuild(self, library: Library, chunk_size: int = 10000) -> int:
+        """Index every item from scratch in one transaction; returns the number of (item, genre) rows"""
+        self.create_table(library)
+        self.create_triggers(library)
+        self.library = self.library or library
+        sql, values = self._select_sql('items.id > ? ORDER BY items.id LIMIT ?')
+        with timings.timed('index'), library.transaction() as tx:
+            # Everything noted so far is read below
+            tx.mutate('DELETE FROM {}'.format(self.changed_table))
+            tx.mutate('DELETE FROM {}'.format(self.table))
+            last_id = 0
+            while rows := tx.query(sql, values + (last_id, chunk_size)):
+                self._write(tx, rows)
+                last_id = rows[-1][0]
+            tx.mutate('DELETE FROM {}'.format(self.state_table))
+            tx.mutate('INSERT INTO {} (fields) VALUES (?)'.format(self.state_table), (self.fields,))
+            self.built = True
+            return tx.query('SELECT COUNT(*) FROM {}'.format(self.table))[0][0]
+
+    def flush(self) -> int:
+        """Re-index the items noted as changed, dropping those no longer in the library
+
+        Returns the number of items re-indexed. Until the library is
+        indexed in full nothing is noted, so there is nothing to do.
+        """
+        if self.library is None or not self.is_built(self.library):
+            return 0
+        with timings.timed('index'), self.library.transaction() as tx:
+            item_ids = [row[0] for row in tx.query('SELECT item_id FROM {}'.format(self.changed_table))]
+            for start in range(0, len(item_ids), self.batch_size):
+                batch = item_ids[start:start + self.batch_size]
+                tx.mutate_many('DELETE FROM {} WHERE item_id = ?'.format(self.table),
+                               ((item_id,) for item_id in batch))
+                sql, values = self._select_sql('items.id IN ({})'.format(', '.join('?' * len(batch))))
+                self._write(tx, tx.query(sql, values + tuple(batch)))
+                # Only the ids read, others may have been noted meanwhile
+                tx.mutate_many('DELETE FROM {} WHERE item_id = ?'.format(self.changed_table),
+                               ((item_id,) for item_id in batch))
+        return len(item_ids)
+
+    @classmethod
+    def counts(cls, library: Library, query: Query | None = None) -> list[tuple[str, int]]:
+        """(genre, item count) for items matching `query` (all if None), most common first"""
+        cls.create_table(library)
+        sql = 'SELECT d.name, COUNT(*) FROM {t} AS g JOIN {d} AS d ON d.id = g.genre_id{s}' \
+              ' GROUP BY g.genre_id ORDER BY 2 DESC, 1'
+        with timings.timed('query'), library.transaction() as tx:
+            if query is None:
+                rows = tx.query(sql.format(t=cls.table, d=cls.dictionary_table, s=''))
+            else:
+                with selection(tx, library, query) as (where, subvals):
+                    rows = tx.query(sql.format(
+                        t=cls.table, d=cls.dictionary_table,
+                        s=' WHERE g.item_id IN (SELECT items.id FROM items WHERE {})'.format(where)
+                    ), subvals)
+        return [tuple(row) for row in rows]
+
+
+class GenresQuery(FieldQuery):
+    """Items tagged with a genre, answered from the genre index
+
+    `genres:Baroque` matches any item with Baroque among its genres;
+    `genres:Classical+` also matches every genre below Classical in the
+    genre tree. The plugin sets `tree` and the fields with `configure`.
+    Before its SQL is used the index is built if needed and brought up to
+    date with the changes its triggers noted; with no library to index yet,
+    items are matched in Python.
+    """
+    tree: Callable[[], GenreTree] | None = None
+    index: GenreIndex = GenreIndex()
+
+    @classmethod
+    def configure(cls, index: GenreIndex, tree: Callable[[], GenreTree] | None = None):
+        cls.index = index
+        cls.tree = tree
+
+    def __init__(self, field_name: str, pattern: str, fast: bool = True):
+        super().__init__(field_name, pattern, fast)
+        self.names = self.expand(pattern)
+        self.lower_names = {name.lower() for name in self.names}
+
+    @classmethod
+    def expand(cls, pattern: str) -> list[str]:
+        name = pattern.strip()
+        if not name.endswith('+') or len(name) == 1:
+            return [name]
+        name = name[:-1].strip()
+        tree = cls.tree() if cls.tree is not None else None
+        return (tree.descendants(name) if tree is not None else []) or [name]
+
+    def col_clause(self):
+        return 'items.id IN (SELECT g.item_id FROM {t} AS g JOIN {d} AS d ON d.id = g.genre_id' \
+               ' WHERE d.name IN ({p}))'.format(t=GenreIndex.table, d=GenreIndex.dictionary_table,
+                                                p=', '.join('?' * len(self.names))), self.names
+
+    def clause(self):
+        library = self.index.library
+        if library is None:
+            return None, ()
+        self.index.ensure(library)
+        self.index.flush()
+        # Indexed whether or not the field is a column
+        return self.col_clause()
+
+    def match(self, item: Item) -> bool:
+        genres = self.index.item_genres(item.get(self.index.genre_field), item.get(self.index.genres_field))
+        return any(genre.lower() in self.lower_names for genre in genres)
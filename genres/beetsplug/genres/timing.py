@@ -0,0 +1,112 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import cProfile
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from math import ceil
+from time import perf_counter
+from typing import Callable
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+class Timings:
+    """Wall-clock samples per named step of a run
+
+    Wrap steps with `timed` (context manager) or `timer` (decorator); both
+    only append one float per call, so they are left on all the time.
+    Samples from worker threads are collected as well.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.items = 0
+        self.started = perf_counter()
+
+    def reset(self):
+        self.samples.clear()
+        self.items = 0
+        self.started = perf_counter()
+
+    @contextmanager
+    def timed(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(perf_counter() - start)
+
+    def timer(self, name: str) -> Callable:
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timed(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count_item(self, count: int = 1):
+        self.items += count
+
+    def stats(self) -> dict:
+        elapsed = perf_counter() - self.started
+        steps = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            steps[name] = {
+                'count': len(ordered),
+                'total': sum(ordered),
+                'p50': percentile(ordered, 0.5),
+                'p95': percentile(ordered, 0.95),
+            }
+        return {
+            'elapsed': elapsed,
+            'items': self.items,
+            'items_per_second': self.items / elapsed if elapsed > 0 else 0.0,
+            'steps': steps,
+        }
+
+    def summary(self) -> list[str]:
+        stats = self.stats()
+        lines = ['{items} item(s) in {elapsed:.2f}s ({items_per_second:.1f}/s)'.format(**stats)]
+        for name, step in sorted(stats['steps'].items(), key=lambda entry: -entry[1]['total']):
+            lines.append('{: <12} {: >7} call(s) {: >9.3f}s total  p50 {: >8.1f} ms  p95 {: >8.1f} ms'.format(
+                name, step['count'], step['total'], step['p50'] * 1000, step['p95'] * 1000))
+        return lines
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as trace_file:
+            json.dump(self.stats(), trace_file, indent=2)
+
+
+# Shared by every module of the plugin, reset at the start of each command
+timings = Timings()
+
+
+def profiled(path: str | None, func: Callable, *args, **kwargs):
+    """Run func, then write a trace to `path` if given
+
+    A path ending in .json gets the step timings, anything else a cProfile
+    dump readable with pstats or snakeviz.
+    """
+    if not path:
+        return func(*args, **kwargs)
+    if path.endswith('.json'):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings.write_json(path)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
@@ -0,0 +1,208 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import os
+import pickle
+from array import array
+from importlib.util import find_spec
+from typing import Iterable
+
+from beets import config as beets_config
+from beets.ui import UserError
+from confuse import load_yaml
+
+cache_version = 1
+
+
+def lastgenre_tree_path() -> str | None:
+    """The genre tree shipped with the lastgenre plugin, if beets has it"""
+    # Located without importing the plugin, which needs pylast
+    spec = find_spec('beetsplug.lastgenre')
+    for location in (spec.submodule_search_locations or []) if spec else []:
+        path = os.path.join(location, 'genres-tree.yaml')
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class GenreTree:
+    """Genre hierarchy with constant-time ancestor queries
+
+    Nodes are numbered in preorder under a nameless root (node 0), so the
+    descendants of a node are the ids right after it, `size` of them in
+    all. Lowest common ancestors come from a sparse table of minimum
+    depths over the Euler tour. Names are matched case-insensitively; a
+    genre listed under several parents is taken from its first place, as
+    lastgenre does.
+    """
+    __slots__ = ('names', 'parents', 'sizes', 'depths', 'first', 'sparse', 'index')
+
+    def __init__(self, names: list[str | None], parents: array, sizes: array, depths: array,
+                 first: array, sparse: list[array]):
+        self.names = names
+        self.parents = parents
+        self.sizes = sizes
+        self.depths = depths
+        self.first = first
+        self.sparse = sparse
+        self.index: dict[str, int] = {}
+        for node in range(len(names) - 1, 0, -1):
+            self.index[names[node].lower()] = node
+
+    @classmethod
+    def from_data(cls, data) -> 'GenreTree':
+        """Build the tables from a parsed lastgenre-style tree (nested lists and mappings)"""
+        names: list[str | None] = [None]
+        parents, sizes, depths = array('i', [0]), array('i', [0]), array('i', [0])
+        euler, first = array('i'), array('i', [0])
+
+        def add(name, parent: int) -> int:
+            node = len(names)
+            names.append(str(name))
+            parents.append(parent)
+            sizes.append(0)
+            depths.append(depths[parent] + 1)
+            first.append(len(euler))
+            euler.append(node)
+            return node
+
+        def walk(children, parent: int):
+            if isinstance(children, dict):
+                children = [{name: value} for name, value in children.items()]
+            elif children is None:
+                children = []
+            elif not isinstance(children, list):
+                children = [children]
+            for child in children:
+                if isinstance(child, dict):
+                    for name, grandchildren in child.items():
+                        node = add(name, parent)
+                        walk(grandchildren, node)
+                        sizes[node] = len(names) - node
+                        euler.append(parent)
+                elif child is not None:
+                    node = add(child, parent)
+                    sizes[node] = 1
+                    euler.append(parent)
+
+        euler.append(0)
+        walk(data, 0)
+        sizes[0] = len(names)
+
+        # sparse[k][i]: the shallowest node of euler[i:i + 2 ** k]
+        sparse = [euler]
+        width = 1
+        while width * 2 <= len(euler):
+            previous = sparse[-1]
+            level = array('i', (
+                a if depths[a] <= depths[b] else b
+                for a, b in zip(previous, previous[width:])
+            ))
+            sparse.append(level)
+            width *= 2
+        return cls(names, parents, sizes, depths, first, sparse)
+
+    @classmethod
+    def from_yaml(cls, path: str) -> 'GenreTree':
+        return cls.from_data(load_yaml(path))
+
+    @classmethod
+    def load(cls, path: str, cache_path: str | None = None) -> 'GenreTree':
+        """The tree in `path`, from `cache_path` unless the tree changed since it was written"""
+        stat = os.stat(path)
+        source = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, cache_version)
+        if cache_path:
+            try:
+                with open(cache_path, 'rb') as cache_file:
+                    cached_source, state = pickle.load(cache_file)
+                if cached_source == source:
+                    return cls(*state)
+            except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+                pass
+        tree = cls.from_yaml(path)
+        if cache_path:
+            tree.write_cache(cache_path, source)
+        return tree
+
+    def write_cache(self, cache_path: str, source: tuple):
+        state = (self.names, self.parents, self.sizes, self.depths, self.first, self.sparse)
+        temp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+        try:
+            with open(temp_path, 'wb') as cache_file:
+                pickle.dump((source, state), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            # A cache that cannot be written only costs the next load
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def __contains__(self, genre: str) -> bool:
+        return genre.lower() in self.index
+
+    def node(self, genre: str) -> int | None:
+        return self.index.get(genre.lower())
+
+    def name(self, genre: str) -> str | None:
+        """The genre as spelled in the tree"""
+        node = self.node(genre)
+        return self.names[node] if node is not None else None
+
+    def is_descendant(self, genre: str, ancestor: str) -> bool:
+        """Whether `genre` is `ancestor` or somewhere below it"""
+        node, top = self.node(genre), self.node(ancestor)
+        if node is None or top is None:
+            return False
+        return top <= node < top + self.sizes[top]
+
+    def ancestors(self, genre: str) -> list[str]:
+        """Parents of `genre`, nearest first"""
+        node = self.node(genre)
+        result = []
+        while node:
+            node = self.parents[node]
+            if node:
+                result.append(self.names[node])
+        return result
+
+    def descendants(self, genre: str) -> list[str]:
+        """`genre` and everything below it"""
+        node = self.node(genre)
+        if node is None:
+            return []
+        return self.names[node:node + self.sizes[node]]
+
+    def _lca(self, a: int, b: int) -> int:
+        left, right = sorted((self.first[a], self.first[b]))
+        level = (right - left + 1).bit_length() - 1
+        row = self.sparse[level]
+        x, y = row[left], row[right - (1 << level) + 1]
+        return x if self.depths[x] <= self.depths[y] else y
+
+    def common_ancestor(self, genres: Iterable[str]) -> str | None:
+        """Most specific genre containing all of `genres`
+
+        None when one of them is not in the tree or they only meet at the
+        root.
+        """
+        result = None
+        for genre in genres:
+            node = self.node(genre)
+            if node is None:
+                return None
+            result = node if result is None else self._lca(result, node)
+            if result == 0:
+                return None
+        return self.names[result] if result else None
+
+
+def load_tree(path: str = '', cache: bool = True) -> GenreTree:
+    """The tree at `path`, or lastgenre's if empty, cached next to the beets config"""
+    path = os.path.expanduser(path) if path else lastgenre_tree_path()
+    if not path or not os.path.exists(path):
+        raise UserError('no genre tree found, set `tree` to a lastgenre-style YAML file')
+    cache_path = os.path.join(beets_config.config_dir(), 'genres-tree.cache') if cache else None
+    return GenreTree.load(path, cache_path)
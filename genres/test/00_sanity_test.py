@@ -7,7 +7,7 @@
 #  License: See LICENSE.txt
 
 
-from beetsplug.template import about
+from beetsplug.genres import about
 from test.helper import TestHelper, Assertions, \
     PLUGIN_NAME, PLUGIN_SHORT_DESCRIPTION, PACKAGE_NAME, PACKAGE_TITLE, \
     PLUGIN_VERSION, \
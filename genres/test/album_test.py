@@ -0,0 +1,85 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.library import Item, Album, parse_query_string
+
+from beetsplug.genres.album import AlbumGenres, store_album_genres
+from beetsplug.genres.tree import GenreTree
+from test.helper import LibraryMixin
+
+
+class AlbumGenresTest(unittest.TestCase):
+    tree = GenreTree.from_data([{'classical': ['baroque', {'romantic': ['opera']}]}, {'jazz': ['bebop']}])
+
+    def test_identical(self):
+        album_genres = AlbumGenres('identical')
+        self.assertEqual('Jazz', album_genres.album_genre(['Jazz', 'Jazz']))
+        self.assertEqual('Various', album_genres.album_genre(['Jazz', '']))
+        self.assertIsNone(album_genres.album_genre(['', '']))
+
+    def test_threshold(self):
+        album_genres = AlbumGenres('threshold', 0.75, various='')
+        self.assertEqual('Jazz', album_genres.album_genre(['Jazz', 'Jazz', 'Jazz', 'Rock']))
+        self.assertIsNone(album_genres.album_genre(['Jazz', 'Jazz', 'Rock', 'Rock']))
+
+    def test_tree(self):
+        album_genres = AlbumGenres('tree', tree=self.tree)
+        self.assertEqual('classical', album_genres.album_genre(['opera', 'baroque', '']))
+        self.assertEqual('romantic', album_genres.album_genre(['opera', 'romantic']))
+        self.assertEqual('Various', album_genres.album_genre(['opera', 'bebop']))
+
+    def test_merged_genres(self):
+        self.assertEqual(
+            ['Jazz', 'Bebop', 'Blues'],
+            AlbumGenres.album_genres(['Jazz', 'Blues', ''], [['Jazz', 'Bebop'], [], ['Bebop', 'Jazz']])
+        )
+
+
+class StoreAlbumGenresTest(LibraryMixin, unittest.TestCase):
+    # `comments` is a column in every beets version, `genre_list` a flexible attribute
+    fields = ('comments', 'genre_list', 'album_genre', 'album_genres')
+
+    def setUp(self):
+        super().setUp()
+        albums = [
+            [('Jazz', 'Jazz; Bebop'), ('Jazz', 'Jazz')],
+            [('Jazz', ''), ('Rock', 'Rock; Punk')],
+            [('', '')],
+        ]
+        for index, tracks in enumerate(albums):
+            items = []
+            for genre, genres in tracks:
+                item = Item(title='Track', album='Album {}'.format(index), comments=genre)
+                if genres:
+                    item['genre_list'] = genres
+                items.append(item)
+            self.lib.add_album(items)
+
+    def test_store(self):
+        summary = store_album_genres(self.lib, parse_query_string('', Album)[0], AlbumGenres('identical'),
+                                     self.fields, chunk_size=2)
+        self.assertEqual({'albums': 3, 'album_genre': 1, 'various': 1}, dict(summary))
+        albums = [self.lib.get_album(album_id) for album_id in (1, 2, 3)]
+        self.assertEqual(['Jazz', 'Various', None], [album.get('album_genre') for album in albums])
+        self.assertEqual(['Jazz; Bebop', 'Jazz; Rock; Punk', None], [album.get('album_genres') for album in albums])
+
+    def test_album_query(self):
+        store_album_genres(self.lib, parse_query_string('album:"Album 1"', Album)[0], AlbumGenres('identical'),
+                           self.fields)
+        self.assertEqual([None, 'Various', None],
+                         [self.lib.get_album(album_id).get('album_genre') for album_id in (1, 2, 3)])
+
+    def test_query_on_track_field(self):
+        # Album 1 matches through its Rock track, and all its tracks count
+        store_album_genres(self.lib, parse_query_string('comments:Rock', Album)[0], AlbumGenres('identical'),
+                           self.fields)
+        album = self.lib.get_album(2)
+        self.assertEqual(('Various', 'Jazz; Rock; Punk'), (album.get('album_genre'), album.get('album_genres')))
+        self.assertIsNone(self.lib.get_album(1).get('album_genre'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.album_bench [ALBUMS] [COMPARED]
+
+import sys
+import tracemalloc
+from time import perf_counter
+
+from beets.library import Album, parse_query_string
+
+from beetsplug.genres.album import AlbumGenres, store_album_genres
+from test.benchmark.library import scratch_dir, synthetic_library
+
+tracks_per_album = 12
+fields = ('genre', 'genres', 'album_genre', 'album_genres')
+
+
+def timed(func):
+    start = perf_counter()
+    result = func()
+    return result, perf_counter() - start
+
+
+def per_album(lib, count: int, album_genres: AlbumGenres) -> int:
+    """What a loop over albums and their items would do, for comparison"""
+    for album in lib.albums('id:..{}'.format(count)):
+        items = list(album.items())
+        album['album_genre'] = album_genres.album_genre([item.get('genre') or '' for item in items])
+        album.store()
+    return count
+
+
+def main(albums: int = 40000, compared: int = 2000):
+    with scratch_dir() as path:
+        lib, build_seconds = timed(lambda: synthetic_library(path, albums * tracks_per_album,
+                                                             tracks_per_album=tracks_per_album))
+        print('{:,} albums, {:,} items ({:.1f}s to build)'.format(albums, albums * tracks_per_album, build_seconds))
+
+        query = parse_query_string('', Album)[0]
+        for mode in ('identical', 'threshold'):
+            album_genres = AlbumGenres(mode, 0.3)
+            summary, seconds = timed(lambda: store_album_genres(lib, query, album_genres, fields))
+            print('  {: <18} {:8.2f}s {:8.1f} µs/album  {}'.format(
+                mode, seconds, seconds / summary['albums'] * 1e6, dict(summary)))
+
+        # Separate run, tracing allocations slows everything down
+        tracemalloc.start()
+        store_album_genres(lib, query, AlbumGenres('threshold', 0.3), fields)
+        print('  peak traced memory {:.1f} MB'.format(tracemalloc.get_traced_memory()[1] / 1e6))
+        tracemalloc.stop()
+
+        written, seconds = timed(lambda: per_album(lib, compared, AlbumGenres('threshold', 0.3)))
+        print('  {: <18} {:8.2f}s {:8.1f} µs/album ({:,} albums)'.format(
+            'album.items() loop', seconds, seconds / written * 1e6, written))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
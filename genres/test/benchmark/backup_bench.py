@@ -0,0 +1,49 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.backup_bench [COUNT] [STORED]
+
+import sys
+from time import perf_counter
+
+from beets.library import Item, parse_query_string
+
+from beetsplug.genres.fields import copy_field
+from test.benchmark.library import scratch_dir, synthetic_library
+
+
+def timed(func):
+    start = perf_counter()
+    result = func()
+    return result, perf_counter() - start
+
+
+def store_each(lib, count: int) -> int:
+    """What a loop over Items would do, for comparison"""
+    for item in lib.items('id:..{}'.format(count)):
+        item['genre_bak'] = item.get('genre')
+        item.store()
+    return count
+
+
+def main(count: int = 1000000, stored: int = 5000):
+    with scratch_dir() as path:
+        lib, build_seconds = timed(lambda: synthetic_library(path, count))
+        print('{:,} items ({:.1f}s to build)'.format(count, build_seconds))
+
+        everything = parse_query_string('', Item)[0]
+        half = parse_query_string('album_id:..{}'.format(count // 24), Item)[0]
+        for label, func in (
+                ('backup', lambda: copy_field(lib, everything, 'genre', 'genre_bak')),
+                ('restore', lambda: copy_field(lib, everything, 'genre_bak', 'genre')),
+                ('backup half', lambda: copy_field(lib, half, 'genre', 'genre_bak')),
+                ('Item.store loop', lambda: store_each(lib, stored)),
+        ):
+            written, seconds = timed(func)
+            print('  {: <18} {:8.2f}s {:8.2f} µs/item ({:,} items)'.format(
+                label, seconds, seconds / max(written, 1) * 1e6, written))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
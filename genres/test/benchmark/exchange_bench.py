@@ -0,0 +1,41 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.exchange_bench [COUNT] [WORKERS]
+
+import os
+import sys
+from time import perf_counter
+
+from beets.library import Item, parse_query_string
+
+from beetsplug.genres.exchange import export_genres, import_genres
+from test.benchmark.library import scratch_dir, synthetic_library
+
+
+def timed(func):
+    start = perf_counter()
+    result = func()
+    return result, perf_counter() - start
+
+
+def main(count: int = 200000, workers: int = 4):
+    with scratch_dir() as path:
+        lib, build_seconds = timed(lambda: synthetic_library(path, count))
+        print('{:,} items ({:.1f}s to build)'.format(count, build_seconds))
+        export_path = os.path.join(path, 'genres.jsonl')
+        fields = ['genre', 'genres']
+
+        written, seconds = timed(lambda: export_genres(lib, parse_query_string('', Item)[0], export_path, fields))
+        print('  {: <18} {:8.2f}s {:8.2f} µs/item ({:.1f} MB)'.format(
+            'export', seconds, seconds / written * 1e6, os.path.getsize(export_path) / 1e6))
+        for key in ('id', 'path'):
+            for worker_count in sorted({1, workers}):
+                (summary, _), seconds = timed(lambda: import_genres(lib, export_path, fields, key, worker_count))
+                print('  {: <18} {:8.2f}s {:8.2f} µs/item'.format(
+                    'import {} x{}'.format(key, worker_count), seconds, seconds / summary['stored'] * 1e6))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
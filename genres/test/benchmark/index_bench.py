@@ -0,0 +1,71 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.index_bench [COUNT]
+
+import sys
+from time import perf_counter
+
+from beets.library import Item, parse_query_string
+
+from beetsplug.genres.fields import value_sql
+from beetsplug.genres.index import GenreIndex, GenresQuery
+from test.benchmark.library import scratch_dir, synthetic_library
+
+genres_field = 'genre_list'
+
+
+def timed(func):
+    start = perf_counter()
+    result = func()
+    return result, perf_counter() - start
+
+
+def like_count(lib, genre: str) -> int:
+    """Tracks tagged `genre` found by scanning the delimited field, for comparison"""
+    sql, values = value_sql(genres_field)
+    with lib.transaction() as tx:
+        return tx.query("SELECT COUNT(*) FROM items WHERE '; ' || {} || '; ' LIKE ?".format(sql),
+                        values + ('%; {}; %'.format(genre),))[0][0]
+
+
+def indexed_count(lib, genre: str) -> int:
+    where, subvals = GenresQuery(genres_field, genre).clause()
+    with lib.transaction() as tx:
+        return tx.query('SELECT COUNT(*) FROM items WHERE {}'.format(where), subvals)[0][0]
+
+
+def flush_changed(lib, index: GenreIndex, count: int) -> int:
+    """Note `count` items as changed, as the triggers would, and re-index them"""
+    with lib.transaction() as tx:
+        tx.mutate('INSERT OR IGNORE INTO {} (item_id) SELECT id FROM items LIMIT ?'.format(index.changed_table),
+                  (count,))
+    return index.flush()
+
+
+def main(count: int = 1000000):
+    with scratch_dir() as path:
+        lib, build_seconds = timed(lambda: synthetic_library(path, count, genres_field=genres_field))
+        print('{:,} items ({:.1f}s to build)'.format(count, build_seconds))
+        index = GenreIndex('genre', genres_field)
+        GenresQuery.configure(index)
+
+        rows, seconds = timed(lambda: index.rebuild(lib))
+        print('  {: <24} {:9.1f} ms ({:,} rows)'.format('rebuild', seconds * 1000, rows))
+        scoped = parse_query_string('album_id:..100', Item)[0]
+        for label, func in (
+                ('counts, all genres', lambda: GenreIndex.counts(lib)),
+                ('counts, album_id:..100', lambda: GenreIndex.counts(lib, scoped)),
+                ('count Jazz, index', lambda: indexed_count(lib, 'Jazz')),
+                ('count Jazz, LIKE scan', lambda: like_count(lib, 'Jazz')),
+                ('items genres:Jazz', lambda: len(lib.items(GenresQuery(genres_field, 'Jazz')))),
+                ('flush 1,000 items', lambda: flush_changed(lib, index, 1000)),
+        ):
+            result, seconds = timed(func)
+            shown = result[:2] if isinstance(result, list) else result
+            print('  {: <24} {:9.1f} ms {}'.format(label, seconds * 1000, shown))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,98 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import json
+import unittest
+
+from beets.library import Item, parse_query_string
+
+from beetsplug.genres.exchange import export_genres, import_genres
+from test.helper import LibraryMixin
+
+
+class ExchangeTest(LibraryMixin, unittest.TestCase):
+    # `comments` is a column in every beets version, `genre_list` a flexible attribute
+    fields = ['comments', 'genre_list']
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tmp_path('genres.jsonl')
+        for index, comments in enumerate(['Baroque', 'Jazz', 'Rock']):
+            item = Item(title='Track {}'.format(index), comments=comments, acoustid_id='acoustid-{}'.format(index),
+                        path='/music/Tr\xe4ck {}.flac'.format(index).encode('utf-8'))
+            item['genre_list'] = '{}; Classical'.format(comments)
+            self.lib.add(item)
+
+    def values(self, field: str) -> list:
+        return [self.lib.get_item(item_id).get(field) for item_id in (1, 2, 3)]
+
+    def clear(self):
+        with self.lib.transaction() as tx:
+            tx.mutate("UPDATE items SET comments = ''")
+            tx.mutate('DELETE FROM item_attributes')
+
+    def test_export(self):
+        query = parse_query_string('comments:Jazz', Item)[0]
+        self.assertEqual(1, export_genres(self.lib, query, self.path, self.fields))
+        with open(self.path, encoding='utf-8') as export_file:
+            self.assertEqual(
+                [{'id': 2, 'acoustid': 'acoustid-1', 'path': '/music/Tr\xe4ck 1.flac',
+                  'comments': 'Jazz', 'genre_list': 'Jazz; Classical'}],
+                [json.loads(line) for line in export_file]
+            )
+
+    def test_round_trip_by_each_key(self):
+        export_genres(self.lib, parse_query_string('', Item)[0], self.path, self.fields, chunk_size=2)
+        for key in ('id', 'acoustid', 'path'):
+            with self.subTest(key=key):
+                self.clear()
+                summary, errors = import_genres(self.lib, self.path, self.fields, key, chunk_size=2)
+                self.assertEqual({'stored': 3, 'unmatched': 0, 'invalid': 0}, dict(summary))
+                self.assertEqual(['Baroque', 'Jazz', 'Rock'], self.values('comments'))
+                self.assertEqual('Rock; Classical', self.lib.get_item(3).get('genre_list'))
+
+    def test_shared_acoustid(self):
+        # The same recording on a compilation
+        self.lib.add(Item(title='Track 0', acoustid_id='acoustid-0'))
+        with open(self.path, 'w', encoding='utf-8') as import_file:
+            import_file.write('{"acoustid": "acoustid-0", "comments": "Opera"}\n')
+        summary, errors = import_genres(self.lib, self.path, self.fields, 'acoustid')
+        self.assertEqual({'stored': 2, 'unmatched': 0, 'invalid': 0}, dict(summary))
+        self.assertEqual(['Opera', 'Opera'], [self.lib.get_item(item_id).comments for item_id in (1, 4)])
+
+    def test_invalid_and_unmatched_lines(self):
+        with open(self.path, 'w', encoding='utf-8') as import_file:
+            import_file.write('{"id": 1, "comments": "Opera"}\n')
+            import_file.write('not json\n')
+            import_file.write('{"id": 99, "comments": "Gone"}\n')
+            import_file.write('{"id": 2, "comments": ["Not", "text"]}\n')
+            import_file.write('{"id": 3, "comments": null, "genre_list": "Punk"}\n')
+        summary, errors = import_genres(self.lib, self.path, self.fields, workers=2, chunk_size=2)
+        self.assertEqual({'stored': 2, 'unmatched': 1, 'invalid': 2}, dict(summary))
+        self.assertEqual(2, len(errors))
+        self.assertTrue(errors[0].startswith('line 2:'))
+        self.assertEqual(['Opera', 'Jazz', 'Rock'], self.values('comments'))
+        self.assertEqual('Punk', self.lib.get_item(3).get('genre_list'))
+
+    def test_round_trip_list_field(self):
+        # The default fields: `genres` is a list column, `genre` plain text
+        fields = ['genre', 'genres']
+        self.lib.add(Item(title='Track 3', genre='Rock', genres=['Rock', 'Pop']))
+        export_genres(self.lib, parse_query_string('id:4', Item)[0], self.path, fields)
+        with open(self.path, encoding='utf-8') as export_file:
+            entry = json.loads(export_file.read())
+        self.assertEqual(('Rock', ['Rock', 'Pop']), (entry['genre'], entry['genres']))
+
+        with open(self.path, 'a', encoding='utf-8') as import_file:
+            import_file.write('{"id": 1, "genres": ["Baroque", "Opera"]}\n')
+        with self.lib.transaction() as tx:
+            tx.mutate("UPDATE items SET genres = ''")
+        summary, errors = import_genres(self.lib, self.path, fields)
+        self.assertEqual({'stored': 2, 'unmatched': 0, 'invalid': 0}, dict(summary))
+        self.assertEqual(['Rock', 'Pop'], self.lib.get_item(4).genres)
+        self.assertEqual(['Baroque', 'Opera'], self.lib.get_item(1).genres)
+
+
+if __name__ == '__main__':
+    unittest.main()
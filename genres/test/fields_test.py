@@ -0,0 +1,55 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.library import Item, parse_query_string
+
+from beetsplug.genres.fields import copy_field
+from test.helper import LibraryMixin
+
+
+class CopyFieldTest(LibraryMixin, unittest.TestCase):
+    # `comments` is a column in every beets version, `genre_bak` a flexible attribute
+    def setUp(self):
+        super().setUp()
+        for index, comments in enumerate(['Baroque', 'Jazz', 'Rock']):
+            self.lib.add(Item(title='Track {}'.format(index), comments=comments, album='Album {}'.format(index % 2)))
+
+    def query(self, text: str = ''):
+        return parse_query_string(text, Item)[0]
+
+    def values(self, field: str) -> list:
+        return [self.lib.get_item(item_id).get(field) for item_id in (1, 2, 3)]
+
+    def test_fixed_to_flexible(self):
+        self.assertEqual(2, copy_field(self.lib, self.query('album:"Album 0"'), 'comments', 'genre_bak'))
+        self.assertEqual(['Baroque', None, 'Rock'], self.values('genre_bak'))
+
+    def test_flexible_to_fixed(self):
+        copy_field(self.lib, self.query(), 'comments', 'genre_bak')
+        with self.lib.transaction() as tx:
+            tx.mutate('UPDATE items SET comments = ?', ('Pop',))
+        # Only items with a backup are restored
+        item = self.lib.get_item(2)
+        del item['genre_bak']
+        item.store()
+        self.assertEqual(2, copy_field(self.lib, self.query(), 'genre_bak', 'comments'))
+        self.assertEqual(['Baroque', 'Pop', 'Rock'], self.values('comments'))
+
+    def test_slow_query(self):
+        copy_field(self.lib, self.query(), 'comments', 'genre_bak')
+        self.assertEqual(1, copy_field(self.lib, self.query('genre_bak::^J'), 'genre_bak', 'genre_copy'))
+        self.assertEqual([None, 'Jazz', None], self.values('genre_copy'))
+
+    def test_album_field_query(self):
+        album = self.lib.add_album([self.lib.get_item(2)])
+        album.artpath = b'/music/cover.jpg'
+        album.store()
+        self.assertEqual(1, copy_field(self.lib, self.query('artpath::cover'), 'comments', 'genre_bak'))
+        self.assertEqual([None, 'Jazz', None], self.values('genre_bak'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,11 +26,12 @@ from beets.util import (
     bytestring_path,
     displayable_path,
 )
-from beets.util.confit import Subview, Dumper
-from beetsplug import template
-from beetsplug.template import common
+from confuse import Subview, Dumper
 from six import StringIO
 
+from beetsplug import genres
+from beetsplug.genres import common
+
 logging.getLogger('beets').propagate = True
 
 # Values
@@ -117,6 +118,26 @@ class Assertions(object):
                             displayable_path(path)))
 
 
+class TempDirMixin(object):
+    """A temporary directory for each test, removed afterwards, as `self.tmpdir`"""
+
+    def setUp(self):
+        super(TempDirMixin, self).setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def tmp_path(self, name: str) -> str:
+        return os.path.join(self.tmpdir.name, name)
+
+
+class LibraryMixin(TempDirMixin):
+    """A new library database in the temporary directory, as `self.lib`"""
+
+    def setUp(self):
+        super(LibraryMixin, self).setUp()
+        self.lib = beets.library.Library(self.tmp_path('library.db'), self.tmpdir.name)
+
+
 class TestHelper(TestCase, Assertions):
     _test_config_dir_ = os.path.join(bytestring_path(os.path.dirname(__file__)),
                                      b'config')
@@ -135,7 +156,7 @@ class TestHelper(TestCase, Assertions):
 
     def reset_beets(self, config_file: bytes):
         self.teardown_beets()
-        plugins._classes = {template.TemplatePlugin}
+        plugins._classes = {genres.GenresPlugin}
         self._setup_beets(config_file)
 
     def _setup_beets(self, config_file: bytes):
@@ -0,0 +1,137 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+from unittest import mock
+
+from beets import plugins
+from beets.library import Item, parse_query_string
+from beets.plugins import BeetsPlugin
+from beets.util import cached_classproperty
+
+from beetsplug.genres import GenresPlugin
+from beetsplug.genres.index import GenreIndex, GenresQuery
+from beetsplug.genres.tree import GenreTree
+from test.helper import LibraryMixin
+
+
+class GenreIndexTest(LibraryMixin, unittest.TestCase):
+    # `comments` is a column in every beets version, `genre_list` a flexible attribute
+    tree = GenreTree.from_data([{'classical': ['baroque', {'romantic': ['opera']}]}, {'jazz': ['bebop']}])
+
+    def setUp(self):
+        super().setUp()
+        for comments, genres in [('Baroque', 'Baroque; Opera'), ('Jazz', ''), ('Opera', 'opera'), ('', '')]:
+            item = Item(title='Track', comments=comments)
+            if genres:
+                item['genre_list'] = genres
+            self.lib.add(item)
+        self.index = GenreIndex('comments', 'genre_list')
+        GenresQuery.configure(self.index, lambda: self.tree)
+        self.addCleanup(GenresQuery.configure, GenreIndex())
+
+    def ids(self, pattern: str) -> list[int]:
+        query = GenresQuery('genre_list', pattern)
+        ids = sorted(item.id for item in self.lib.items(query))
+        self.assertEqual(ids, sorted(item.id for item in self.lib.items() if query.match(item)))
+        return ids
+
+    def test_rebuild_and_query(self):
+        self.assertEqual(4, self.index.rebuild(self.lib))
+        self.assertEqual([1, 3], self.ids('OPERA'))
+        self.assertEqual([2], self.ids('Jazz'))
+        self.assertEqual([], self.ids('Rock'))
+        self.assertEqual([1, 3], self.ids('classical+'))
+        self.assertEqual([], self.ids('classical'))
+
+    def test_counts(self):
+        self.index.rebuild(self.lib)
+        self.assertEqual([('Opera', 2), ('Baroque', 1), ('Jazz', 1)], GenreIndex.counts(self.lib))
+        self.assertEqual([('Opera', 1)], GenreIndex.counts(self.lib, parse_query_string('id:3', Item)[0]))
+        # Flexible attribute queries are matched before counting
+        self.assertEqual([('Baroque', 1), ('Opera', 1)],
+                         GenreIndex.counts(self.lib, parse_query_string('genre_list:Baroque', Item)[0]))
+
+    def test_changed_items(self):
+        self.index.rebuild(self.lib)
+        item = self.lib.get_item(2)
+        item['genre_list'] = 'Bebop'
+        item.store()
+        self.lib.get_item(3).remove()
+        self.assertEqual(2, self.index.flush())
+        self.assertEqual([2], self.ids('jazz+'))
+        self.assertEqual([1], self.ids('opera'))
+
+    def test_changes_made_outside_the_plugin(self):
+        self.index.rebuild(self.lib)
+        # Bulk SQL, as another program or this plugin with the index turned off would write
+        with self.lib.transaction() as tx:
+            tx.mutate("UPDATE items SET comments = 'Bebop' WHERE id = 4")
+            tx.mutate("INSERT INTO item_attributes (entity_id, key, value) VALUES (2, 'genre_list', 'Opera')")
+        index = GenreIndex('comments', 'genre_list')
+        index.library = self.lib
+        GenresQuery.configure(index, lambda: self.tree)
+        self.assertEqual([4], self.ids('jazz+'))
+        self.assertEqual([1, 2, 3], self.ids('opera'))
+
+    def test_rebuilt_for_other_fields(self):
+        self.index.rebuild(self.lib)
+        self.assertTrue(GenreIndex('comments', 'genres').ensure(self.lib))
+        # An index built before its fields were recorded
+        with self.lib.transaction() as tx:
+            tx.mutate('DELETE FROM {}'.format(GenreIndex.state_table))
+        self.assertTrue(GenreIndex('comments', 'genre_list').ensure(self.lib))
+        self.assertFalse(GenreIndex('comments', 'genre_list').ensure(self.lib))
+
+    def test_not_built_checked_once(self):
+        self.index.library = self.lib
+        self.assertEqual(0, self.index.flush())
+        with mock.patch.object(self.lib, 'transaction', side_effect=AssertionError):
+            self.assertEqual(0, self.index.flush())
+
+
+class PluginQueryTest(LibraryMixin, unittest.TestCase):
+    """`genres:` as registered by the plugin, on a library indexed before"""
+
+    def setUp(self):
+        super().setUp()
+        self.lib.add(Item(title='Track', genres=['Rock', 'Punk']))
+
+        listeners = {event: list(funcs) for event, funcs in BeetsPlugin.listeners.items()}
+        raw_listeners = {event: list(funcs) for event, funcs in BeetsPlugin._raw_listeners.items()}
+        self.addCleanup(self.restore, BeetsPlugin.listeners, listeners)
+        self.addCleanup(self.restore, BeetsPlugin._raw_listeners, raw_listeners)
+        plugin = GenresPlugin()
+        plugins._instances.append(plugin)
+        self.addCleanup(plugins._instances.remove, plugin)
+        # Named queries are collected from plugins once per model
+        cached_classproperty.cache.pop((Item, '_queries'), None)
+        self.addCleanup(cached_classproperty.cache.pop, (Item, '_queries'), None)
+        self.addCleanup(GenresQuery.configure, GenreIndex())
+        plugins.send('library_opened', lib=self.lib)
+
+    @staticmethod
+    def restore(listeners: dict, saved: dict):
+        listeners.clear()
+        listeners.update(saved)
+
+    def ids(self, query: str) -> list[int]:
+        return sorted(item.id for item in self.lib.items(query))
+
+    def test_indexed_on_first_query(self):
+        self.assertIsInstance(parse_query_string('genres:rock', Item)[0].subqueries[0], GenresQuery)
+        self.assertEqual([1], self.ids('genres:rock'))
+
+    def test_changes_indexed_before_query(self):
+        self.assertEqual([1], self.ids('genres:punk'))
+        self.lib.add(Item(title='Track', genres=['Punk']))
+        item = self.lib.get_item(1)
+        item.genres = ['Rock']
+        item.store()
+        self.assertEqual([2], self.ids('genres:punk'))
+        self.assertEqual([1], self.ids('genres:rock'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import os
+import unittest
+
+from beetsplug.genres.tree import GenreTree
+from test.helper import TempDirMixin
+
+tree_yaml = """
+- classical:
+    - baroque
+    - romantic:
+        - opera
+        - late romantic
+- jazz:
+    - bebop
+    - fusion
+- rock:
+    - fusion
+    - punk:
+"""
+
+
+class GenreTreeTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.tmp_path('tree.yaml')
+        self.cache_path = self.tmp_path('tree.cache')
+        with open(self.path, 'w', encoding='utf-8') as tree_file:
+            tree_file.write(tree_yaml)
+        self.tree = GenreTree.from_yaml(self.path)
+
+    def test_queries(self):
+        self.assertEqual(11, len(self.tree))
+        self.assertTrue(self.tree.is_descendant('Opera', 'classical'))
+        self.assertTrue(self.tree.is_descendant('romantic', 'romantic'))
+        self.assertFalse(self.tree.is_descendant('classical', 'opera'))
+        self.assertFalse(self.tree.is_descendant('bebop', 'classical'))
+        self.assertEqual(['romantic', 'classical'], self.tree.ancestors('late romantic'))
+        self.assertEqual(['romantic', 'opera', 'late romantic'], self.tree.descendants('romantic'))
+        # A genre listed twice is found in its first place
+        self.assertEqual(['jazz'], self.tree.ancestors('fusion'))
+        self.assertIn('punk', self.tree)
+
+    def test_common_ancestor(self):
+        self.assertEqual('classical', self.tree.common_ancestor(['opera', 'Baroque']))
+        self.assertEqual('romantic', self.tree.common_ancestor(['opera', 'late romantic', 'romantic']))
+        self.assertEqual('bebop', self.tree.common_ancestor(['bebop']))
+        self.assertIsNone(self.tree.common_ancestor(['opera', 'punk']))
+        self.assertIsNone(self.tree.common_ancestor(['opera', 'polka']))
+
+    def test_cache_follows_tree_changes(self):
+        GenreTree.load(self.path, self.cache_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertEqual('classical', GenreTree.load(self.path, self.cache_path).common_ancestor(['opera', 'baroque']))
+
+        with open(self.path, 'w', encoding='utf-8') as tree_file:
+            tree_file.write('- classical:\n    - opera\n- early music:\n    - baroque\n')
+        os.utime(self.path, ns=(0, 1))
+        tree = GenreTree.load(self.path, self.cache_path)
+        self.assertEqual(4, len(tree))
+        self.assertIsNone(tree.common_ancestor(['opera', 'baroque']))
+
+
+if __name__ == '__main__':
+    unittest.main()
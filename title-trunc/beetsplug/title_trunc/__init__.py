@@ -5,10 +5,13 @@
 import os
 
 from beets.dbcore import types
+from beets.library import Library, Album, Item
 from beets.plugins import BeetsPlugin
 from confuse import ConfigSource, load_yaml
 
 from beetsplug.title_trunc.command import TitleTruncCommand
+from beetsplug.title_trunc.memo_command import TitleTruncMemoCommand
+from beetsplug.title_trunc.pending import PendingItems
 
 
 class TitleTruncPlugin(BeetsPlugin):
@@ -21,6 +24,35 @@ class TitleTruncPlugin(BeetsPlugin):
         config_file_path = os.path.join(os.path.dirname(__file__), self._default_plugin_config_file_name_)
         source = ConfigSource(load_yaml(config_file_path) or {}, config_file_path)
         self.config.add(source)
+        self.pending: PendingItems | None = None
+
+        if self.config['pending'].get(bool):
+            self.register_listener('item_imported', self.item_changed)
+            self.register_listener('album_imported', self.album_imported)
+            self.register_listener('after_write', self.item_changed)
+            self.register_listener('database_change', self.database_changed)
+            self.register_listener('import', self.store_pending)
+            self.register_listener('cli_exit', self.store_pending)
 
     def commands(self):
-        return [TitleTruncCommand(self.config)]
+        return [TitleTruncCommand(self.config), TitleTruncMemoCommand(self.config)]
+
+    def _pending(self) -> PendingItems:
+        if self.pending is None:
+            self.pending = PendingItems(self.config['length'].get(int))
+        return self.pending
+
+    def item_changed(self, item: Item, lib: Library | None = None, **_):
+        self._pending().consider(item, lib)
+
+    def album_imported(self, lib: Library, album: Album):
+        for item in album.items():
+            self._pending().consider(item, lib)
+
+    def database_changed(self, lib: Library, model):
+        if isinstance(model, Item):
+            self._pending().consider(model, lib)
+
+    def store_pending(self, **_):
+        if self.pending is not None:
+            self.pending.flush()
@@ -0,0 +1,87 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from beaupy import prompt
+from beets.library import Library, Item
+from beets.ui import colorize
+
+from beetsplug.title_trunc.select_trunc import SelectTrunc, print_highlight_len
+from beetsplug.title_trunc.substitutions import Substitutions
+from beetsplug.title_trunc.timing import timings
+
+
+def common_prefix(titles: list[str]) -> str:
+    """Longest prefix shared by all `titles`, cut back to a word boundary"""
+    if len(titles) < 2:
+        return ''
+    # The common prefix of the smallest and largest titles is shared by all
+    first, last = min(titles), max(titles)
+    end = 0
+    for first_char, last_char in zip(first, last):
+        if first_char != last_char:
+            break
+        end += 1
+    if any(len(title) > end and not title[end].isspace() for title in titles):
+        end = first.rfind(' ', 0, end)
+    return first[:max(end, 0)].rstrip()
+
+
+class AlbumTrunc:
+    """Rewrite the prefix shared by long titles of an album in one prompt
+
+    Classical albums often repeat the work name on every track, e.g.
+        Concerto for Piano and Orchestra #1 in C major, Op․ 15∶ I․ Allegro con brio
+        Concerto for Piano and Orchestra #1 in C major, Op․ 15∶ II․ Largo
+    Replacing "Concerto for Piano and Orchestra" with "Piano Concerto" once
+    fixes the whole album.
+    """
+
+    def __init__(
+            self,
+            items: list[Item],
+            library: Library,
+            length: int,
+            min_prefix: int = 10,
+            substitutions: Substitutions | None = None,
+    ):
+        self.items = items
+        self.library = library
+        self.length = length
+        self.min_prefix = min_prefix
+        self.titles = {
+            item.id: SelectTrunc(item=item, library=library, length=length, substitutions=substitutions).title
+            for item in items
+        }
+        self.prefix = common_prefix(list(self.titles.values()))
+
+    def get_short_titles(self) -> dict[int, str]:
+        """Prompt for the prefix replacement and return rewritten titles by item id
+
+        Returns an empty dict if there is no usable prefix or the user skips.
+        """
+        if len(self.prefix) < self.min_prefix:
+            return {}
+
+        with timings.timed('album'):
+            album = self.library.get_album(self.items[0])
+        if album is not None:
+            print("\n{}".format(colorize('cyan', album.get('album'))))
+        for item in self.items:
+            print_highlight_len(self.titles[item.id], self.length, item.get('track'))
+
+        with timings.timed('prompt'):
+            replacement = prompt(
+                'Replace common prefix on {} tracks (or Esc to skip):'.format(len(self.items)),
+                initial_value=self.prefix
+            )
+        if replacement is None or replacement == self.prefix:
+            return {}
+        return self.rewrite(replacement)
+
+    def rewrite(self, replacement: str) -> dict[int, str]:
+        prefix_len = len(self.prefix)
+        return {
+            item_id: '{}{}'.format(replacement, title[prefix_len:]).strip()
+            for item_id, title in self.titles.items()
+        }
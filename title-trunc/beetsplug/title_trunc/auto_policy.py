@@ -0,0 +1,82 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from collections import Counter
+
+from confuse import Subview
+
+from beetsplug.title_trunc.patterns import registry
+
+ellip = '…'
+
+
+class AutoPolicy:
+    """Score truncation candidates so one can be chosen without prompting
+
+    A candidate's score is the weight of the rule that produced it plus
+    - `keep_last_paren` if it still ends with the last parenthetical group
+    - `ellipsis` if it contains an ellipsis
+    - `lost_char` for every character dropped from the title
+    Candidates over the length limit are never chosen. Ties go to the
+    candidate generated first.
+    """
+
+    default_rules = {
+        'existing': 50,
+        'colon_keep_paren': 30,
+        'no_paren': 20,
+        'colon_head': 15,
+        'separator_head': 10,
+        'colon_tail': 5,
+        'separator_tail': 0,
+        'ellipsis_end': 0,
+        'ellipsis_middle': 0,
+    }
+
+    def __init__(
+            self,
+            rules: dict[str, float] | None = None,
+            keep_last_paren: float = 20,
+            ellipsis: float = -40,
+            lost_char: float = -0.5,
+    ):
+        self.rules = dict(self.default_rules)
+        self.rules.update(rules or {})
+        self.keep_last_paren = keep_last_paren
+        self.ellipsis = ellipsis
+        self.lost_char = lost_char
+        self.summary = Counter()
+
+    @classmethod
+    def from_config(cls, cfg: Subview):
+        return cls(
+            rules={rule: weight.as_number() for rule, weight in cfg['rules'].items()},
+            keep_last_paren=cfg['keep_last_paren'].as_number(),
+            ellipsis=cfg['ellipsis'].as_number(),
+            lost_char=cfg['lost_char'].as_number(),
+        )
+
+    def score(self, title: str, candidate: str, rule: str, last_paren: str | None = None) -> float:
+        score = self.rules.get(rule, 0)
+        if last_paren and candidate.endswith(last_paren):
+            score += self.keep_last_paren
+        if ellip in candidate:
+            score += self.ellipsis
+        score += self.lost_char * max(len(title) - len(candidate), 0)
+        return score
+
+    def choose(self, title: str, length: int, options: list, rules: list[str]) -> tuple[str | None, str]:
+        paren_groups = registry['paren_group'].findall(title)
+        last_paren = paren_groups[-1] if paren_groups else None
+
+        best, best_rule, best_score = None, 'none', None
+        for option, rule in zip(options, rules):
+            candidate = option[1]
+            if len(candidate) > length:
+                continue
+            score = self.score(title, candidate, rule, last_paren)
+            if best_score is None or score > best_score:
+                best, best_rule, best_score = candidate, rule, score
+        self.summary[best_rule] += 1
+        return best, best_rule
@@ -1,16 +1,32 @@
 #  Copyright (c) 2020-2023
 #  Author: Scott Yeskie
 #  License: See LICENSE.txt
+from itertools import groupby
 from optparse import OptionParser
+from typing import Iterable, TYPE_CHECKING
 
 from beets.dbcore.query import AndQuery
 from beets.library import Library, Item, parse_query_parts
 from beets.ui import Subcommand, decargs
 from confuse import Subview
 
-from beetsplug.title_trunc import common
-from beetsplug.title_trunc.length_query import OverMaxLengthQuery
-from beetsplug.title_trunc.select_trunc import SelectTrunc
+from beetsplug.title_trunc import common, patterns
+from beetsplug.title_trunc.auto_policy import AutoPolicy
+from beetsplug.title_trunc.length_index import ensure_length_index
+from beetsplug.title_trunc.memo import DecisionMemo
+from beetsplug.title_trunc.journal import RunJournal
+from beetsplug.title_trunc.item_stream import count_items, stream_items
+from beetsplug.title_trunc.prefetch import Prefetcher
+from beetsplug.title_trunc.length_query import LengthQuery, OverMaxLengthQuery, FlexOverMaxLengthQuery
+from beetsplug.title_trunc.path_budget import PathBudget
+from beetsplug.title_trunc.pending import PendingItems, PendingQuery
+from beetsplug.title_trunc.plan import PlanWriter, apply_plan, read_plan
+from beetsplug.title_trunc.store_buffer import StoreBuffer
+from beetsplug.title_trunc.substitutions import Substitutions, substitutions_from_config
+from beetsplug.title_trunc.timing import timings, profiled
+
+if TYPE_CHECKING:
+    from beetsplug.title_trunc.select_trunc import SelectTrunc
 
 
 class TitleTruncCommand(Subcommand):
@@ -18,9 +34,35 @@ class TitleTruncCommand(Subcommand):
     lib: Library = None
     query = None
     parser: OptionParser = None
+    store_buffer: StoreBuffer = None
+    memo: DecisionMemo = None
+    journal: RunJournal | None = None
+    progress_count = 0
+    progress_total = 0
+    auto_policy: AutoPolicy = None
+    substitutions: Substitutions = None
+    path_budget: PathBudget | None = None
 
+    cfg_album = False
+    cfg_album_min_prefix = 10
+    cfg_auto = False
     cfg_force = False
+    cfg_journal = True
     cfg_length = 75
+    cfg_length_index = True
+    cfg_memo = True
+    cfg_memo_max_age = 365
+    cfg_memo_max_size = 100000
+    cfg_path_field = 'title_short'
+    cfg_path_max_bytes = 0
+    cfg_pending = False
+    cfg_plan: str | None = None
+    cfg_profile: str | None = None
+    cfg_prefetch = 4
+    cfg_prefetch_workers = 1
+    cfg_store_batch = 50
+    cfg_stream_chunk = 500
+    cfg_store_interval = 30.0
 
     def __init__(self, cfg):
         self.config = cfg
@@ -42,6 +84,18 @@ class TitleTruncCommand(Subcommand):
             help=u'force analysis of items with short title already set '
         )
 
+        self.parser.add_option(
+            '-a', '--auto',
+            action='store_true', dest='auto', default=None,
+            help=u'choose the best scoring title without prompting'
+        )
+
+        self.parser.add_option(
+            '-A', '--album',
+            action='store_true', dest='album', default=None,
+            help=u'rewrite the title prefix shared by tracks of an album first'
+        )
+
         self.parser.add_option(
             '-l', '--length',
             type='int',
@@ -49,6 +103,45 @@ class TitleTruncCommand(Subcommand):
             help=u'Set length to truncate title'
         )
 
+        self.parser.add_option(
+            '-b', '--path-bytes',
+            type='int',
+            action='store', dest='path_bytes', default=None,
+            help=u'also fit the path component holding the short title in this many bytes'
+        )
+
+        self.parser.add_option(
+            '-p', '--pending',
+            action='store_true', dest='pending', default=False,
+            help=u'only look at items added or retitled since they were last checked'
+        )
+
+        self.parser.add_option(
+            '--plan',
+            action='store', dest='plan', default=None, metavar='FILE',
+            help=u'write candidates and the auto choice for each item to FILE (JSON Lines) '
+                 u'without prompting or storing'
+        )
+
+        self.parser.add_option(
+            '--profile',
+            action='store', dest='profile', default=None, metavar='FILE',
+            help=u'write step timings (FILE.json) or a cProfile dump (any other name) and show a summary'
+        )
+
+        self.parser.add_option(
+            '--apply',
+            action='store', dest='apply', default=None, metavar='FILE',
+            help=u'store the chosen titles from a plan FILE'
+        )
+
+        self.parser.add_option(
+            '--undo',
+            type='int',
+            action='store', dest='undo', default=None, metavar='RUN',
+            help=u'put back the short titles a run replaced'
+        )
+
         super(TitleTruncCommand, self).__init__(
             parser=self.parser,
             name=common.plg_ns['__PLUGIN_NAME__'],
@@ -75,51 +168,276 @@ class TitleTruncCommand(Subcommand):
             self.show_version_information()
             return
 
+        if options.undo is not None:
+            self.undo_run(options.undo)
+            return
+
+        self.cfg_journal = self.config['journal'].get(bool)
+        if options.apply:
+            self.apply_plan(options.apply)
+            return
+
         self.cfg_length = options.max_len
         self.cfg_force = options.force
-        self.handle_main_task()
+        self.cfg_plan = options.plan
+        self.cfg_pending = options.pending
+        self.cfg_profile = options.profile
+        self.cfg_auto = options.auto if options.auto is not None else self.config['auto'].get(bool)
+        self.cfg_album = options.album if options.album is not None else self.config['album'].get(bool)
+        self.cfg_album_min_prefix = self.config['album_min_prefix'].get(int)
+        self.cfg_length_index = self.config['length_index'].get(bool)
+        self.cfg_memo = self.config['memo'].get(bool)
+        self.cfg_memo_max_age = self.config['memo_max_age'].as_number()
+        self.cfg_memo_max_size = self.config['memo_max_size'].get(int)
+        self.cfg_path_field = self.config['path_field'].as_str()
+        self.cfg_path_max_bytes = options.path_bytes if options.path_bytes is not None \
+            else self.config['path_max_bytes'].get(int)
+        self.cfg_prefetch = self.config['prefetch'].get(int)
+        self.cfg_prefetch_workers = self.config['prefetch_workers'].get(int)
+        self.cfg_store_batch = self.config['store_batch'].get(int)
+        self.cfg_stream_chunk = self.config['stream_chunk'].get(int)
+        self.cfg_store_interval = self.config['store_interval'].as_number()
+        self.substitutions = substitutions_from_config(self.config['substitutions'])
+        patterns.registry.configure_from(self.config['patterns'])
+        if self.cfg_path_max_bytes > 0:
+            self.path_budget = PathBudget(lib, self.cfg_path_max_bytes, self.cfg_path_field)
+        timings.reset()
+        profiled(self.cfg_profile, self.handle_main_task)
+        self.show_timings()
+        self.show_run()
 
     def handle_main_task(self):
         print("MAIN")
-        items = self.retrieve_library_items()
-        print('{} item(s) found'.format(len(items)))
-        if not items:
+        items, total = self.retrieve_library_items()
+        print('{} item(s) found'.format(total))
+        if total == 0:
             "No items selected to process"
             return
+        self.progress_total = total
+        self.progress_count = 0
+        if self.cfg_auto or self.cfg_plan:
+            self.auto_policy = AutoPolicy.from_config(self.config['auto_policy'])
+        if self.cfg_memo:
+            if not self.cfg_plan:
+                DecisionMemo.prune(self.lib, self.cfg_memo_max_age, self.cfg_memo_max_size)
+            # Plan mode does not write to the library, not even the memo table
+            self.memo = DecisionMemo(self.lib, self.cfg_length, read_only=bool(self.cfg_plan))
+        if self.cfg_plan:
+            self.write_plan(items)
+            return
         print('Processing items')
-        for item in items:
-            if item.get('title_short') is None or self.cfg_force:
-                self.process_item(item)
+        with StoreBuffer(self.lib, self.cfg_store_batch, self.cfg_store_interval) as self.store_buffer:
+            if self.memo is not None:
+                self.store_buffer.flush_hooks.append(self.memo.write)
+            if self.cfg_journal:
+                self.journal = RunJournal(self.lib, self.run_description())
+                self.store_buffer.change_hooks.append(self.journal.record)
+                self.store_buffer.flush_hooks.append(self.journal.write)
+            if self.cfg_album:
+                for album_id, album_items in groupby(items, key=lambda album_item: album_item.album_id):
+                    self.process_album_items(album_id, list(album_items))
+            elif self.cfg_prefetch > 0 and not self.cfg_auto:
+                # Prepare the next items while the user is choosing
+                with Prefetcher(items, self.prepare_selector, self.cfg_prefetch,
+                                self.cfg_prefetch_workers) as prefetcher:
+                    for item, selector in prefetcher:
+                        self.process_item(item, selector=selector)
             else:
-                print(item.get('title_short'))
+                for item in items:
+                    self.process_item(item)
+        if self.cfg_auto:
+            self.show_auto_summary()
 
-    def retrieve_library_items(self) -> list[Item]:
+    def retrieve_library_items(self) -> tuple[Iterable[Item], int]:
+        """Matching items and how many there are
+
+        Items are streamed in chunks unless a sort order is needed, so the
+        first prompt does not wait for every long title to be loaded.
+        """
         print("RETRIEVE")
         cmd_query = self.query
+        if self.cfg_album:
+            # Keep tracks of an album together for grouping
+            cmd_query = cmd_query + ['album_id+', 'disc+', 'track+']
         parsed_cmd_query, parsed_ordering = parse_query_parts(cmd_query, Item)
-        len_query = OverMaxLengthQuery('title', str(self.cfg_length))
+        if self.path_budget is None:
+            len_query = OverMaxLengthQuery('title', str(self.cfg_length))
+        else:
+            # The byte limit depends on the rest of the path, so every titled item is checked
+            len_query = LengthQuery('title', '1..')
+        if self.cfg_length_index and not self.cfg_plan:
+            ensure_length_index(self.lib, len_query.field_name)
+
+        subqueries = [len_query]
+        if not self.cfg_force and self.path_budget is None:
+            subqueries.append(FlexOverMaxLengthQuery('title_short', str(self.cfg_length)))
+        if self.cfg_pending:
+            if not self.cfg_plan:
+                # Items shortened or retitled since they were queued are done
+                PendingItems.prune(self.lib, AndQuery(subqueries))
+            subqueries.append(PendingQuery(self.lib))
+        full_query = AndQuery([parsed_cmd_query] + subqueries)
+        total = count_items(self.lib, full_query)
+        if self.cfg_stream_chunk > 0 and not parsed_ordering and total is not None:
+            return stream_items(self.lib, full_query, self.cfg_stream_chunk), total
+
+        items = self.lib.items(full_query, parsed_ordering)
+        return items, total if total is not None else len(items)
 
-        full_query = AndQuery([parsed_cmd_query, len_query])
-        # TODO: Work in non-force filtering earlier if possible
-        return self.lib.items(full_query, parsed_ordering)
+    def process_album_items(self, album_id: int | None, items: list[Item]):
+        short_titles = {}
+        # The replacement prefix is typed by the user, so auto mode goes straight to the tracks
+        if album_id is not None and len(items) > 1 and not self.cfg_auto:
+            # Imported here so beaupy is only loaded when prompting
+            from beetsplug.title_trunc.album_trunc import AlbumTrunc
+            short_titles = AlbumTrunc(
+                items=items,
+                library=self.lib,
+                length=self.cfg_length,
+                min_prefix=self.cfg_album_min_prefix,
+                substitutions=self.substitutions,
+            ).get_short_titles()
 
-    def process_item(self, item: Item):
+        remaining = []
+        for item in items:
+            short_title = short_titles.get(item.id)
+            if short_title is not None and self.title_fits(item, short_title):
+                self.store_buffer.add(item, {'title_short': short_title})
+            else:
+                remaining.append((item, short_title))
+        self.store_buffer.flush()
+
+        # Tracks still too long start from the rewritten title
+        for item, short_title in remaining:
+            self.process_item(item, short_title)
+
+    def title_fits(self, item: Item, title: str) -> bool:
+        if len(title) > self.cfg_length:
+            return False
+        return self.path_budget is None or self.path_budget.fits(item, title)
+
+    def needs_short_title(self, item: Item) -> bool:
         title: str = item.get("title")
+        if self.path_budget is not None:
+            # Bytes are counted on the title as it would be stored
+            title = self.memo_key(item)
         title_short: str | None = item.get('title_short', default=None)
-        if len(title) <= self.cfg_length:
-            return
-        if not self.cfg_force and (title_short and len(title_short) <= self.cfg_length):
-            return
+        if self.title_fits(item, title):
+            return False
+        return self.cfg_force or not (title_short and self.title_fits(item, title_short))
 
-        selector = SelectTrunc(
+    def memo_key(self, item: Item, rewritten_title: str | None = None) -> str:
+        """The title as SelectTrunc sees it, after substitutions"""
+        return self.substitutions.apply((rewritten_title or item.get('title')).strip())
+
+    def use_memo(self) -> bool:
+        return self.memo is not None and not self.cfg_force
+
+    def make_selector(self, item: Item, rewritten_title: str | None = None) -> 'SelectTrunc':
+        # Imported here so beaupy is only loaded when the command runs
+        from beetsplug.title_trunc.select_trunc import SelectTrunc
+        return SelectTrunc(
             item=item,
             library=self.lib,
             length=self.cfg_length,
+            title=rewritten_title,
+            substitutions=self.substitutions,
+            budget=self.path_budget.for_item(item) if self.path_budget is not None else None,
         )
-        short_title = selector.get_short_title()
+
+    def prepare_selector(self, item: Item) -> 'SelectTrunc | None':
+        """Build the selector with its candidates and album, run in a worker thread"""
+        if not self.needs_short_title(item):
+            return None
+        if self.use_memo() and self.memo_key(item) in self.memo:
+            return None
+        return self.make_selector(item).prepare(with_album=True)
+
+    def process_item(
+            self,
+            item: Item,
+            rewritten_title: str | None = None,
+            selector: 'SelectTrunc | None' = None,
+    ):
+        if not self.needs_short_title(item):
+            return
+
+        self.progress_count += 1
+        timings.count_item()
+        progress = '{}/{}'.format(self.progress_count, self.progress_total)
+        memo_key = self.memo_key(item, rewritten_title)
+        if self.use_memo():
+            short_title = self.memo.get(memo_key)
+            if short_title is not None and self.title_fits(item, short_title):
+                print('{} [memo] {}'.format(progress, short_title))
+                self.store_buffer.add(item, {'title_short': short_title})
+                return
+
+        selector = selector or self.make_selector(item, rewritten_title)
+        if self.cfg_auto:
+            short_title, rule = selector.get_auto_short_title(self.auto_policy)
+            print('{} [{}] {}'.format(progress, rule, short_title))
+        else:
+            print(progress)
+            short_title = selector.get_short_title()
+            if short_title is not None and self.memo is not None:
+                self.memo.remember(memo_key, short_title)
         if short_title is not None:
-            item.update({'title_short': short_title})
-            item.store()  # TODO: Dry-run no-store?
+            self.store_buffer.add(item, {'title_short': short_title})
+
+    def write_plan(self, items: Iterable[Item]):
+        """Write every candidate and the auto choice instead of prompting and storing"""
+        with PlanWriter(self.cfg_plan, self.cfg_length) as plan:
+            for item in items:
+                if not self.needs_short_title(item):
+                    continue
+                selector = self.make_selector(item).prepare()
+                short_title, rule = selector.get_auto_short_title(self.auto_policy)
+                if self.use_memo():
+                    memo_title = self.memo.get(self.memo_key(item))
+                    if memo_title is not None and self.title_fits(item, memo_title):
+                        short_title, rule = memo_title, 'memo'
+                plan.write(
+                    item, selector.title,
+                    (option.title for option in selector.options), selector.option_rules,
+                    short_title, rule
+                )
+        self._say('Wrote {} item(s) to {}'.format(plan.count, self.cfg_plan), log_only=False)
+        self.show_auto_summary()
+
+    def apply_plan(self, path: str):
+        if self.cfg_journal:
+            self.journal = RunJournal(self.lib, '--apply {}'.format(path))
+        count, skipped = apply_plan(self.lib, read_plan(path), journal=self.journal,
+                                    memo=self.config['memo'].get(bool))
+        self._say('Stored {} short title(s) from {}'.format(count, path), log_only=False)
+        if skipped:
+            self._say('Skipped {} item(s) removed or retitled since the plan'.format(skipped), log_only=False)
+        self.show_run()
+
+    def run_description(self) -> str:
+        return ' '.join(self.query) or '(all items)'
+
+    def undo_run(self, run_id: int):
+        restored, skipped = RunJournal.undo(self.lib, run_id)
+        self._say('Restored {} short title(s) from run {}'.format(restored, run_id), log_only=False)
+        if skipped:
+            self._say('Left {} item(s) changed since the run'.format(skipped), log_only=False)
+
+    def show_run(self):
+        if self.journal is not None and self.journal.run_id is not None:
+            self._say('Run {id}: {count} change(s), undo with `beet {plg} --undo {id}`'.format(
+                id=self.journal.run_id, count=self.journal.count, plg=common.plg_ns['__PLUGIN_NAME__']
+            ), log_only=False)
+
+    def show_auto_summary(self):
+        self._say('Auto-selected rules:', log_only=False)
+        for rule, count in self.auto_policy.summary.most_common():
+            self._say('{: >6} {}'.format(count, rule), log_only=False)
+
+    def show_timings(self):
+        for line in timings.summary():
+            self._say(line, log_only=not self.cfg_profile)
 
     def show_version_information(self):
         self._say("{pt}({pn}) plugin for Beets: v{ver}".format(
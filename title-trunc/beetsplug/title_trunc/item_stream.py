@@ -0,0 +1,65 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from typing import Iterator
+
+from beets.dbcore import Query, sort_from_strings
+from beets.dbcore.query import InQuery
+from beets.library import Library, Item
+
+from beetsplug.title_trunc.timing import timings
+
+
+def _from_clause(query: Query) -> str:
+    source = Item._table
+    if query.field_names & Item.other_db_fields:
+        source += ' {}'.format(Item.relation_join)
+    return source
+
+
+@timings.timer('query')
+def count_items(library: Library, query: Query) -> int | None:
+    """Count matching items with a single COUNT(*) query
+
+    Returns None when part of the query can only be evaluated in Python.
+    """
+    where, subvals = query.clause()
+    if where is None:
+        return None
+    with library.transaction() as tx:
+        rows = tx.query(
+            'SELECT COUNT(DISTINCT {t}.id) FROM {s} WHERE {w}'.format(
+                t=Item._table, s=_from_clause(query), w=where),
+            subvals
+        )
+    return rows[0][0]
+
+
+def stream_items(library: Library, query: Query, chunk_size: int = 500) -> Iterator[Item]:
+    """Yield matching items in id order, loading `chunk_size` at a time
+
+    Each chunk first selects just the next ids (which an index on the query
+    can answer without reading rows), then loads those items. Chunks start
+    after the last id seen rather than at an offset, so items that stop
+    matching once processed (e.g. a title_short was stored) do not shift
+    the following chunks.
+    """
+    where, subvals = query.clause()
+    if where is None:
+        yield from library.items(query)
+        return
+
+    id_sort = sort_from_strings(Item, ['id+'])
+    id_sql = 'SELECT {t}.id FROM {s} WHERE ({w}) AND {t}.id > ? GROUP BY {t}.id ORDER BY {t}.id LIMIT ?'.format(
+        t=Item._table, s=_from_clause(query), w=where)
+    last_id = 0
+    while True:
+        with timings.timed('query'):
+            with library.transaction() as tx:
+                ids = [row[0] for row in tx.query(id_sql, list(subvals) + [last_id, chunk_size])]
+            items = list(library.items(InQuery('id', ids), id_sort)) if ids else []
+        if not items:
+            return
+        yield from items
+        last_id = ids[-1]
@@ -0,0 +1,129 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from time import time
+
+from beets.dbcore.db import Transaction
+from beets.library import Library, Item
+from beets.ui import UserError
+
+
+class RunJournal:
+    """Append-only record of the values a run replaced, so it can be undone
+
+    Each run gets a row in the runs table, created with its first change;
+    every stored value adds (run, item, field, old value, new value, time)
+    to the journal table. Changes are queued by `record` and written by
+    `write` (hooked into the store buffer, so they are committed together
+    with the items).
+    """
+    runs_table = 'title_trunc_runs'
+    table = 'title_trunc_journal'
+
+    def __init__(self, library: Library, description: str = ''):
+        self.library = library
+        self.description = description
+        self.run_id: int | None = None
+        self.count = 0
+        self.pending: list[tuple[int, str, str | None, str | None, float]] = []
+        self.create_table(library)
+
+    @classmethod
+    def create_table(cls, library: Library):
+        with library.transaction() as tx:
+            tx.script(
+                'CREATE TABLE IF NOT EXISTS {r} ('
+                ' id INTEGER PRIMARY KEY,'
+                ' started REAL NOT NULL,'
+                ' description TEXT NOT NULL,'
+                ' undone REAL);'
+                'CREATE TABLE IF NOT EXISTS {j} ('
+                ' run_id INTEGER NOT NULL,'
+                ' item_id INTEGER NOT NULL,'
+                ' field TEXT NOT NULL,'
+                ' old_value TEXT,'
+                ' new_value TEXT,'
+                ' changed REAL NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS {j}_by_run ON {j} (run_id, item_id, field);'.format(
+                    r=cls.runs_table, j=cls.table)
+            )
+
+    def record(self, item: Item, values: dict):
+        """Queue the change `values` is about to make to `item`"""
+        now = time()
+        for field, value in values.items():
+            old = item.get(field)
+            if old != value:
+                self.pending.append((item.id, field, old, value, now))
+
+    def start_run(self, tx: Transaction) -> int:
+        if self.run_id is None:
+            self.run_id = tx.mutate(
+                'INSERT INTO {} (started, description) VALUES (?, ?)'.format(self.runs_table),
+                (time(), self.description)
+            )
+        return self.run_id
+
+    def write(self, tx: Transaction):
+        if not self.pending:
+            return
+        run_id = self.start_run(tx)
+        tx.mutate_many(
+            'INSERT INTO {} (run_id, item_id, field, old_value, new_value, changed)'
+            ' VALUES (?, ?, ?, ?, ?, ?)'.format(self.table),
+            [(run_id,) + change for change in self.pending]
+        )
+        self.count += len(self.pending)
+        self.pending.clear()
+
+    def record_flex_values(self, tx: Transaction, field: str, values: list[tuple[int, str]]):
+        """Journal the current value of `field` for each (item id, new value) before a bulk write"""
+        run_id = self.start_run(tx)
+        now = time()
+        before = tx.query('SELECT total_changes()')[0][0]
+        tx.mutate_many(
+            'INSERT INTO {} (run_id, item_id, field, old_value, new_value, changed)'
+            ' SELECT ?, items.id, ?,'
+            ' (SELECT value FROM item_attributes WHERE entity_id = items.id AND key = ?), ?, ?'
+            ' FROM items WHERE items.id = ?'.format(self.table),
+            [(run_id, field, field, value, now, item_id) for item_id, value in values]
+        )
+        self.count += tx.query('SELECT total_changes()')[0][0] - before
+
+    @classmethod
+    def undo(cls, library: Library, run_id: int) -> tuple[int, int]:
+        """Put back the values a run replaced, in one transaction
+
+        Values changed again since the run are left alone. Only flexible
+        attributes are restored. Returns (restored, skipped).
+        """
+        cls.create_table(library)
+        with library.transaction() as tx:
+            run = tx.query('SELECT undone FROM {} WHERE id = ?'.format(cls.runs_table), (run_id,))
+            if not run:
+                raise UserError('no run {}'.format(run_id))
+            if run[0][0] is not None:
+                raise UserError('run {} was already undone'.format(run_id))
+            # The first old value and the last new value of each item and field
+            rows = tx.query(
+                'SELECT item_id, field,'
+                ' (SELECT old_value FROM {j} AS first WHERE first.run_id = j.run_id'
+                '  AND first.item_id = j.item_id AND first.field = j.field ORDER BY rowid LIMIT 1),'
+                ' (SELECT new_value FROM {j} AS last WHERE last.run_id = j.run_id'
+                '  AND last.item_id = j.item_id AND last.field = j.field ORDER BY rowid DESC LIMIT 1)'
+                ' FROM {j} AS j WHERE run_id = ? GROUP BY item_id, field'.format(j=cls.table),
+                (run_id,)
+            )
+            before = tx.query('SELECT total_changes()')[0][0]
+            tx.mutate_many(
+                'UPDATE item_attributes SET value = ? WHERE entity_id = ? AND key = ? AND value IS ?',
+                [(old, item_id, field, new) for item_id, field, old, new in rows if old is not None]
+            )
+            tx.mutate_many(
+                'DELETE FROM item_attributes WHERE entity_id = ? AND key = ? AND value IS ?',
+                [(item_id, field, new) for item_id, field, old, new in rows if old is None]
+            )
+            restored = tx.query('SELECT total_changes()')[0][0] - before
+            tx.mutate('UPDATE {} SET undone = ? WHERE id = ?'.format(cls.runs_table), (time(), run_id))
+        return restored, len(rows) - restored
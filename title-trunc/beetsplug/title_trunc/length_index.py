@@ -0,0 +1,39 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from weakref import WeakKeyDictionary
+
+from beets.library import Library, Item
+
+# Fields indexed per open library, forgotten with the library (an id could be reused by another one)
+_ensured: WeakKeyDictionary[Library, set[str]] = WeakKeyDictionary()
+
+
+def length_index_name(field: str) -> str:
+    return 'title_trunc_length_{}'.format(field)
+
+
+def ensure_length_index(library: Library, field: str = 'title') -> bool:
+    """Create an index on length(field) so OverMaxLengthQuery is a range seek
+
+    SQLite keeps expression indexes up to date on every insert and update,
+    so nothing needs to listen for item changes. Only fixed fields can be
+    indexed; returns whether an index is in place.
+    """
+    if field not in Item._fields:
+        return False
+    ensured = _ensured.setdefault(library, set())
+    if field in ensured:
+        return True
+    with library.transaction() as tx:
+        tx.mutate('CREATE INDEX IF NOT EXISTS {name} ON {table} (length({field}))'.format(
+            name=length_index_name(field), table=Item._table, field=field))
+    ensured.add(field)
+    return True
+
+
+def drop_length_index(library: Library, field: str = 'title'):
+    with library.transaction() as tx:
+        tx.mutate('DROP INDEX IF EXISTS {}'.format(length_index_name(field)))
+    _ensured.get(library, set()).discard(field)
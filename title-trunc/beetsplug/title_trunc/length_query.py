@@ -2,20 +2,124 @@
 #  Author: Scott Yeskie
 #  License: See LICENSE.txt
 
+from itertools import compress
+from math import floor, inf
+from typing import Sequence
+
 from beets.dbcore.query import NumericQuery
+from beets.library import Item
+
+
+class LengthQuery(NumericQuery):
+    """Match on the length of a field's value
+
+    The pattern uses the numeric range syntax on the length: '50' exactly 50,
+    '51..' over 50, '..50' at most 50, '10..50' between. Works on fixed and
+    flexible fields alike, in SQL (a flexible attribute is looked up with a
+    subquery) and in Python, with the same results: a missing value never
+    matches, anything else is measured as text.
+    """
+    flex_table = 'item_attributes'
+    model_table = 'items'
+
+    def clause(self):
+        # Flexible attributes are handled in SQL too, regardless of `fast`
+        return self.col_clause()
+
+    def _length_expr(self) -> tuple[str, tuple]:
+        if self.field_name in Item._fields:
+            # Kept as length(field) to match the expression index
+            return f'length({self.field})', ()
+        return (
+            f'(SELECT length(flex.value) FROM {self.flex_table} AS flex'
+            f' WHERE flex.entity_id = {self.model_table}.id AND flex.key = ?)',
+            (self.field_name,)
+        )
+
+    def _bounds(self) -> tuple[float, float]:
+        if self.point is not None:
+            return self.point, self.point
+        return (
+            self.rangemin if self.rangemin is not None else -inf,
+            self.rangemax if self.rangemax is not None else inf,
+        )
+
+    def col_clause(self):
+        expr, subvals = self._length_expr()
+        if self.point is not None:
+            return f'{expr} = ?', subvals + (self.point,)
+        if self.rangemin is not None and self.rangemax is not None:
+            return f'{expr} BETWEEN ? AND ?', subvals + (self.rangemin, self.rangemax)
+        if self.rangemin is not None:
+            return f'{expr} >= ?', subvals + (self.rangemin,)
+        if self.rangemax is not None:
+            return f'{expr} <= ?', subvals + (self.rangemax,)
+        return f'{expr} IS NOT NULL', subvals
+
+    @staticmethod
+    def _length(value) -> int | None:
+        if value is None:
+            return None
+        if not isinstance(value, (str, bytes)):
+            value = str(value)
+        return len(value)
+
+    def match(self, item):
+        length = self._length(item.get(self.field_name))
+        if length is None:
+            return False
+        low, high = self._bounds()
+        return low <= length <= high
+
+    def match_many(self, items: Sequence[Item]) -> list[bool]:
+        """`match` for a whole chunk of items in one pass"""
+        low, high = self._bounds()
+        field = self.field_name
+        length = self._length
+        lengths = [length(item.get(field)) for item in items]
+        return [value is not None and low <= value <= high for value in lengths]
 
+    def filter_many(self, items: Sequence[Item]) -> list[Item]:
+        return list(compress(items, self.match_many(items)))
+
+
+class OverMaxLengthQuery(LengthQuery):
+    """Length over `pattern` (the maximum length)"""
+
+    def __init__(self, field, pattern, fast=True):
+        self.maxlen = self._convert(pattern)
+        super().__init__(field, '{}..'.format(floor(self.maxlen) + 1), fast)
+
+
+class WithinMaxLengthQuery(LengthQuery):
+    """Length at most `pattern` (the maximum length)"""
+
+    def __init__(self, field, pattern, fast=True):
+        self.maxlen = self._convert(pattern)
+        super().__init__(field, '..{}'.format(self.maxlen), fast)
+
+
+class FlexOverMaxLengthQuery(NumericQuery):
+    """Match items whose flexible attribute is unset, empty or over maxlen
+
+    The check runs as a correlated subquery on the flexible attribute table,
+    so items that already have a short enough value are never loaded.
+    """
+    flex_table = 'item_attributes'
+    model_table = 'items'
 
-class OverMaxLengthQuery(NumericQuery):
     def __init__(self, field, pattern, fast=True):
         super().__init__(field, pattern, fast)
         self.maxlen = self._convert(pattern)
 
     def match(self, item):
-        if self.field not in item:
-            return False
-        value = item[self.field]
-        return len(value) <= self.maxlen
+        value = item.get(self.field_name)
+        return not value or len(value) > self.maxlen
 
     def col_clause(self):
-        # SQLite length() function
-        return f'length({self.field}) > ?', (self.maxlen,)
+        return (
+            f'NOT EXISTS (SELECT 1 FROM {self.flex_table} AS flex'
+            f' WHERE flex.entity_id = {self.model_table}.id AND flex.key = ?'
+            f' AND flex.value != \'\' AND length(flex.value) <= ?)',
+            (self.field_name, self.maxlen)
+        )
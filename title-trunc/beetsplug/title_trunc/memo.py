@@ -0,0 +1,128 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from time import time
+from typing import Iterable, Iterator
+
+from beets.dbcore.db import Transaction
+from beets.library import Library
+
+
+class DecisionMemo:
+    """Short titles chosen before, keyed by (normalized title, length)
+
+    Stored in a side table of the library database. The entries for the
+    length in use are loaded once, so lookups are dictionary hits; new
+    decisions are queued and written by `write` (hooked into the store
+    buffer, so they are committed together with the items). A read-only
+    memo leaves the database alone and is empty if it has no table yet.
+    """
+    table = 'title_trunc_memo'
+
+    def __init__(self, library: Library, length: int, read_only: bool = False):
+        self.library = library
+        self.length = length
+        rows = []
+        if not read_only:
+            self.create_table(library)
+        if not read_only or self.exists(library):
+            with library.transaction() as tx:
+                rows = tx.query(
+                    'SELECT title, short_title FROM {} WHERE length = ?'.format(self.table),
+                    (length,)
+                )
+        self.entries: dict[str, str] = {row[0]: row[1] for row in rows}
+        self.pending: dict[str, str] = {}
+        self.used: set[str] = set()
+
+    @classmethod
+    def create_table(cls, library: Library):
+        with library.transaction() as tx:
+            tx.script(
+                'CREATE TABLE IF NOT EXISTS {t} ('
+                ' title TEXT NOT NULL,'
+                ' length INTEGER NOT NULL,'
+                ' short_title TEXT NOT NULL,'
+                ' created REAL NOT NULL,'
+                ' used REAL NOT NULL,'
+                ' PRIMARY KEY (title, length));'
+                'CREATE INDEX IF NOT EXISTS {t}_by_used ON {t} (used);'.format(t=cls.table)
+            )
+
+    @classmethod
+    def exists(cls, library: Library) -> bool:
+        with library.transaction() as tx:
+            return bool(tx.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (cls.table,)))
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.entries
+
+    def get(self, title: str) -> str | None:
+        short_title = self.entries.get(title)
+        if short_title is not None:
+            self.used.add(title)
+        return short_title
+
+    def remember(self, title: str, short_title: str):
+        self.entries[title] = short_title
+        self.pending[title] = short_title
+        self.used.discard(title)
+
+    @classmethod
+    def record(cls, tx: Transaction, decisions: Iterable[tuple[str, int, str]]):
+        """Store (title, length, short title) decisions as made just now"""
+        now = time()
+        tx.mutate_many(
+            'INSERT OR REPLACE INTO {} (title, length, short_title, created, used)'
+            ' VALUES (?, ?, ?, ?, ?)'.format(cls.table),
+            [(title, length, short_title, now, now) for title, length, short_title in decisions]
+        )
+
+    def write(self, tx: Transaction):
+        now = time()
+        if self.pending:
+            self.record(tx, [(title, self.length, short_title) for title, short_title in self.pending.items()])
+            self.pending.clear()
+        if self.used:
+            tx.mutate_many(
+                'UPDATE {} SET used = ? WHERE title = ? AND length = ?'.format(self.table),
+                [(now, title, self.length) for title in self.used]
+            )
+            self.used.clear()
+
+    @classmethod
+    def prune(cls, library: Library, max_age: float = 0, max_size: int = 0) -> int:
+        """Drop entries unused for `max_age` days, then the least recently
+        used ones over `max_size`. 0 disables either limit.
+        """
+        cls.create_table(library)
+        removed = 0
+        with library.transaction() as tx:
+            if max_age > 0:
+                tx.mutate('DELETE FROM {} WHERE used < ?'.format(cls.table), (time() - max_age * 86400,))
+                removed += tx.query('SELECT changes()')[0][0]
+            if max_size > 0:
+                tx.mutate(
+                    'DELETE FROM {t} WHERE rowid IN'
+                    ' (SELECT rowid FROM {t} ORDER BY used DESC LIMIT -1 OFFSET ?)'.format(t=cls.table),
+                    (max_size,)
+                )
+                removed += tx.query('SELECT changes()')[0][0]
+        return removed
+
+    @classmethod
+    def entries_of(cls, library: Library, pattern: str | None = None) -> Iterator[tuple]:
+        """(title, length, short_title, created, used) rows, most recently used first"""
+        cls.create_table(library)
+        where, subvals = '', ()
+        if pattern:
+            where, subvals = ' WHERE title LIKE ? OR short_title LIKE ?', ('%{}%'.format(pattern),) * 2
+        with library.transaction() as tx:
+            rows = tx.query(
+                'SELECT title, length, short_title, created, used FROM {}{} ORDER BY used DESC'.format(
+                    cls.table, where),
+                subvals
+            )
+        for row in rows:
+            yield tuple(row)
@@ -0,0 +1,100 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import json
+from datetime import datetime
+from optparse import OptionParser
+
+from beets.library import Library
+from beets.ui import Subcommand, UserError, decargs
+from confuse import Subview
+
+from beetsplug.title_trunc import common
+from beetsplug.title_trunc.memo import DecisionMemo
+
+
+class TitleTruncMemoCommand(Subcommand):
+    config: Subview = None
+    lib: Library = None
+    parser: OptionParser = None
+
+    actions = ('list', 'prune', 'export')
+
+    def __init__(self, cfg):
+        self.config = cfg
+
+        self.parser = OptionParser(
+            usage='beet {plg}-memo list [TEXT] | prune | export FILE'.format(
+                plg=common.plg_ns['__PLUGIN_NAME__']
+            ))
+
+        self.parser.add_option(
+            '--max-age',
+            type='float',
+            action='store', dest='max_age', default=None,
+            help=u'prune: forget titles unused for this many days'
+        )
+
+        self.parser.add_option(
+            '--max-size',
+            type='int',
+            action='store', dest='max_size', default=None,
+            help=u'prune: keep at most this many titles'
+        )
+
+        super(TitleTruncMemoCommand, self).__init__(
+            parser=self.parser,
+            name='{}-memo'.format(common.plg_ns['__PLUGIN_NAME__']),
+            aliases=['{}m'.format(common.plg_ns['__PLUGIN_ALIAS__'])] if
+            common.plg_ns['__PLUGIN_ALIAS__'] else [],
+            help=u'List, prune or export remembered short titles'
+        )
+
+    def func(self, lib: Library, options, arguments):
+        self.lib = lib
+        arguments = decargs(arguments)
+        if not arguments or arguments[0] not in self.actions:
+            raise UserError('expected one of: {}'.format(', '.join(self.actions)))
+
+        match arguments:
+            case ['list', *text]:
+                self.list_entries(' '.join(text))
+            case ['prune']:
+                self.prune(options)
+            case ['export', path]:
+                self.export(path)
+            case _:
+                raise UserError(self.parser.get_usage())
+
+    def list_entries(self, text: str):
+        for title, length, short_title, _, used in DecisionMemo.entries_of(self.lib, text):
+            print('{} [{}] {}\n    {}'.format(
+                datetime.fromtimestamp(used).strftime('%Y-%m-%d'), length, title, short_title))
+
+    def prune(self, options):
+        max_age = options.max_age if options.max_age is not None \
+            else self.config['memo_max_age'].as_number()
+        max_size = options.max_size if options.max_size is not None \
+            else self.config['memo_max_size'].get(int)
+        removed = DecisionMemo.prune(self.lib, max_age, max_size)
+        self._say('Removed {} remembered title(s)'.format(removed), log_only=False)
+
+    def export(self, path: str):
+        count = 0
+        with open(path, 'w', encoding='utf-8') as export_file:
+            for title, length, short_title, created, used in DecisionMemo.entries_of(self.lib):
+                export_file.write(json.dumps({
+                    'title': title,
+                    'length': length,
+                    'short_title': short_title,
+                    'created': created,
+                    'used': used,
+                }, ensure_ascii=False))
+                export_file.write('\n')
+                count += 1
+        self._say('Exported {} remembered title(s) to {}'.format(count, path), log_only=False)
+
+    @staticmethod
+    def _say(msg, log_only=True, is_error=False):
+        common.say(msg, log_only, is_error)
@@ -0,0 +1,140 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Sequence
+
+import beets
+from beets.library import Library, Item, parse_query_string
+from beets.util import asciify_path
+
+PF_KEY_DEFAULT = 'default'
+marker = '\x00'
+
+
+@lru_cache(maxsize=None)
+def _path_format_query(query_str: str):
+    return parse_query_string(query_str, Item)[0]
+
+
+@lru_cache(maxsize=None)
+def field_component(path_format: str, field: str) -> str | None:
+    """The last component of `path_format` that uses `field`, if any"""
+    uses_field = re.compile(r'\$(\{{{0}\}}|{0}\b)'.format(re.escape(field)))
+    for component in reversed(path_format.split('/')):
+        if uses_field.search(component):
+            return component
+    return None
+
+
+class ComponentBudget:
+    """Encoded size of a path component for any value of one field
+
+    The component is rendered once with a marker in place of the field and
+    split around it, so sizing a candidate is only a concatenation, the
+    library's replacements and an encode. When a template function hides the
+    marker (e.g. %left), every candidate is rendered through the template.
+    """
+
+    def __init__(self, item: Item, field: str, component: str, max_bytes: int, suffix: str = ''):
+        self.item = item
+        self.field = field
+        self.component = component
+        self.max_bytes = max_bytes
+        self.replacements = item._db.replacements if item._db else []
+        self.asciify = beets.config['asciify_paths'].get(bool)
+        self.sep_repl = beets.config['path_sep_replace'].as_str()
+        self.encoding = sys.getfilesystemencoding()
+        self.suffix_bytes = len(suffix.lower().encode(self.encoding, 'surrogateescape'))
+
+        parts = self._render(marker).split(marker)
+        self.parts = parts if len(parts) > 1 else None
+
+    def _render(self, value: str) -> str:
+        probe = self.item.copy()
+        probe[self.field] = value
+        return probe.evaluate_template(self.component, for_path=True)
+
+    def _encoded_size(self, rendered: str) -> int:
+        if self.asciify:
+            rendered = asciify_path(rendered)
+        for regex, repl in self.replacements:
+            rendered = regex.sub(repl, rendered)
+        return len(rendered.encode(self.encoding, 'surrogateescape')) + self.suffix_bytes
+
+    def size(self, text: str) -> int:
+        return self.sizes([text])[0]
+
+    def sizes(self, texts: Sequence[str]) -> list[int]:
+        """Encoded size of the component for each of `texts`"""
+        if self.parts is None:
+            return [self._encoded_size(self._render(text)) for text in texts]
+        sep_repl = self.sep_repl
+        join = self.parts
+        return [
+            self._encoded_size(text.replace(os.sep, sep_repl).join(join))
+            for text in texts
+        ]
+
+    def fits(self, text: str) -> bool:
+        return self.size(text) <= self.max_bytes
+
+    def char_limit(self, text: str, tail: str = '') -> int:
+        """Most leading characters of `text` that fit when followed by `tail`"""
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.fits(text[:middle] + tail):
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+
+class PathBudget:
+    """Byte limit on the path component a field is rendered into
+
+    Filesystems limit each path component in bytes (255 on ext4), after
+    beets' path formatting, replacements and extension. The component is
+    taken from the path format the library would choose for each item.
+    """
+
+    def __init__(self, library: Library, max_bytes: int = 255, field: str = 'title_short'):
+        self.library = library
+        self.max_bytes = max_bytes
+        self.field = field
+        self._budgets: dict[int, ComponentBudget | None] = {}
+
+    def path_format(self, item: Item) -> str:
+        default = None
+        for query_str, path_format in self.library.path_formats:
+            if query_str == PF_KEY_DEFAULT:
+                default = default or path_format
+            elif _path_format_query(query_str).match(item):
+                return path_format
+        return default
+
+    def for_item(self, item: Item) -> ComponentBudget | None:
+        """Budget for `item`, None when its path does not use the field"""
+        if item.id in self._budgets:
+            return self._budgets[item.id]
+        path_format = self.path_format(item)
+        component = field_component(path_format, self.field) if path_format else None
+        budget = None
+        if component is not None:
+            # The extension is appended to the file name only
+            last = path_format.endswith(component)
+            suffix = os.path.splitext(os.fsdecode(item.get('path') or b''))[1] if last else ''
+            budget = ComponentBudget(item, self.field, component, self.max_bytes, suffix)
+        if len(self._budgets) >= 256:
+            self._budgets.pop(next(iter(self._budgets)))
+        self._budgets[item.id] = budget
+        return budget
+
+    def fits(self, item: Item, text: str) -> bool:
+        budget = self.for_item(item)
+        return budget is None or budget.fits(text)
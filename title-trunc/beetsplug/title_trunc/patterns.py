@@ -0,0 +1,51 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import os
+import re
+from typing import Callable
+
+from confuse import Subview, load_yaml
+
+
+class PatternRegistry:
+    """Named regular expressions, each compiled once on first use
+
+    Holding on to the compiled patterns avoids depending on the small `re`
+    module cache, which other plugins can churn between items.
+    """
+
+    def __init__(self, sources: dict[str, str] | Callable[[], dict[str, str]]):
+        # A callable is only called on first use, keeping plugin import cheap
+        self._load = sources if callable(sources) else lambda: sources
+        self._sources: dict[str, str] | None = None
+        self._compiled: dict[str, re.Pattern] = {}
+
+    @property
+    def sources(self) -> dict[str, str]:
+        if self._sources is None:
+            self._sources = dict(self._load())
+        return self._sources
+
+    def configure(self, sources: dict[str, str]):
+        self.sources.update(sources)
+        self._compiled.clear()
+
+    def configure_from(self, cfg: Subview):
+        self.configure({name: view.as_str() for name, view in cfg.items()})
+
+    def __getitem__(self, name: str) -> re.Pattern:
+        try:
+            return self._compiled[name]
+        except KeyError:
+            pattern = self._compiled[name] = re.compile(self.sources[name])
+            return pattern
+
+
+def _default_sources() -> dict[str, str]:
+    config_file_path = os.path.join(os.path.dirname(__file__), 'config_default.yml')
+    return dict((load_yaml(config_file_path) or {}).get('patterns', {}))
+
+
+registry = PatternRegistry(_default_sources)
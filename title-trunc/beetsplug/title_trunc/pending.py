@@ -0,0 +1,138 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from threading import Lock
+from time import time
+
+from beets.dbcore.db import Transaction
+from beets.dbcore.query import Query
+from beets.library import Library, Item
+
+
+class PendingItems:
+    """Items added or retitled since the last run, kept in a side table
+
+    Library events report items as they change; `consider` sorts them into
+    ids to add or drop, and `write` stores both sets in one transaction, so
+    `beet tt --pending` only looks at what changed.
+    """
+    table = 'title_trunc_pending'
+
+    def __init__(self, length: int, batch_size: int = 500):
+        self.length = length
+        self.batch_size = max(batch_size, 1)
+        self.library: Library | None = None
+        self.added: set[int] = set()
+        self.dropped: set[int] = set()
+        self.lock = Lock()
+
+    @classmethod
+    def create_table(cls, library: Library):
+        with library.transaction() as tx:
+            tx.script(
+                'CREATE TABLE IF NOT EXISTS {} ('
+                ' item_id INTEGER PRIMARY KEY,'
+                ' queued REAL NOT NULL)'.format(cls.table)
+            )
+
+    @classmethod
+    def exists(cls, library: Library) -> bool:
+        with library.transaction() as tx:
+            return bool(tx.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (cls.table,)))
+
+    def needs_short_title(self, item: Item) -> bool:
+        title = item.get('title') or ''
+        title_short = item.get('title_short')
+        return len(title) > self.length and not (title_short and len(title_short) <= self.length)
+
+    def consider(self, item: Item, library: Library | None = None):
+        if item.id is None:
+            return
+        with self.lock:
+            self.library = self.library or library or item._db
+            if self.needs_short_title(item):
+                self.added.add(item.id)
+                self.dropped.discard(item.id)
+            else:
+                self.dropped.add(item.id)
+                self.added.discard(item.id)
+            due = len(self.added) + len(self.dropped) >= self.batch_size
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        with self.lock:
+            added, dropped = self.added, self.dropped
+            self.added, self.dropped = set(), set()
+        if self.library is None or not (added or dropped):
+            return 0
+        self.create_table(self.library)
+        with self.library.transaction() as tx:
+            self.write(tx, added, dropped)
+        return len(added)
+
+    def write(self, tx: Transaction, added: set[int], dropped: set[int]):
+        if dropped:
+            tx.mutate_many(
+                'DELETE FROM {} WHERE item_id = ?'.format(self.table),
+                [(item_id,) for item_id in dropped]
+            )
+        if added:
+            now = time()
+            tx.mutate_many(
+                'INSERT OR IGNORE INTO {} (item_id, queued) VALUES (?, ?)'.format(self.table),
+                [(item_id, now) for item_id in added]
+            )
+
+    @classmethod
+    def count(cls, library: Library) -> int:
+        cls.create_table(library)
+        with library.transaction() as tx:
+            return tx.query('SELECT COUNT(*) FROM {}'.format(cls.table))[0][0]
+
+    @classmethod
+    def prune(cls, library: Library, query: Query) -> int:
+        """Drop pending items `query` no longer matches (fixed, removed or short)"""
+        where, subvals = query.clause()
+        if where is None:
+            return 0
+        cls.create_table(library)
+        with library.transaction() as tx:
+            # One primary key lookup per pending row, however large the library
+            tx.mutate(
+                'DELETE FROM {t} WHERE NOT EXISTS'
+                ' (SELECT 1 FROM items WHERE items.id = {t}.item_id AND ({w}))'.format(t=cls.table, w=where),
+                subvals
+            )
+            return tx.query('SELECT changes()')[0][0]
+
+
+class PendingQuery(Query):
+    """Items in the pending table, none if it was never created"""
+
+    def __init__(self, library: Library):
+        self.library = library
+        self._ids: set[int] | None = None
+        self._exists = False
+
+    @property
+    def field_names(self) -> set[str]:
+        return {'id'}
+
+    def exists(self) -> bool:
+        self._exists = self._exists or PendingItems.exists(self.library)
+        return self._exists
+
+    def clause(self):
+        if not self.exists():
+            return '0', ()
+        return 'items.id IN (SELECT item_id FROM {})'.format(PendingItems.table), ()
+
+    def match(self, item):
+        if self._ids is None:
+            self._ids = set()
+            if self.exists():
+                with self.library.transaction() as tx:
+                    self._ids = {row[0] for row in tx.query('SELECT item_id FROM {}'.format(PendingItems.table))}
+        return item.id in self._ids
@@ -0,0 +1,113 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import json
+from collections import namedtuple
+from typing import Iterable, Iterator, TextIO
+
+from beets.library import Library, Item
+from beets.ui import UserError
+
+from beetsplug.title_trunc.journal import RunJournal
+from beetsplug.title_trunc.memo import DecisionMemo
+from beetsplug.title_trunc.pending import PendingItems
+
+# A plan line with a title chosen: `title` is the item title the plan was made
+# from, `rewritten` the title the candidates were built from (the memo key)
+PlanEntry = namedtuple('PlanEntry', ['id', 'title', 'rewritten', 'length', 'chosen'])
+
+
+class PlanWriter:
+    """Write truncation plans as JSON Lines, one item per line
+
+    Each line holds the item, every candidate with the rule that built it,
+    the length limit and the chosen short title. Edit `chosen` (null to skip) and hand the
+    file to `read_plan`/`apply_plan`.
+    """
+
+    def __init__(self, path: str, length: int | None = None):
+        self.path = path
+        self.length = length
+        self.count = 0
+        self.file: TextIO | None = None
+
+    def write(self, item: Item, title: str, candidates: Iterable[str], rules: Iterable[str],
+              chosen: str | None, rule: str):
+        self.file.write(json.dumps({
+            'id': item.id,
+            'title': item.get('title'),
+            'rewritten': title,
+            'title_short': item.get('title_short'),
+            'length': self.length,
+            'candidates': [
+                {'title': candidate, 'rule': candidate_rule}
+                for candidate, candidate_rule in zip(candidates, rules)
+            ],
+            'chosen': chosen,
+            'rule': rule,
+        }, ensure_ascii=False))
+        self.file.write('\n')
+        self.count += 1
+
+    def __enter__(self):
+        self.file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.file.close()
+
+
+def read_plan(path: str) -> Iterator[PlanEntry]:
+    """A `PlanEntry` for each line of a plan with a title chosen"""
+    with open(path, encoding='utf-8') as plan_file:
+        for line_number, line in enumerate(plan_file, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                item_id, chosen = int(entry['id']), entry.get('chosen')
+                length = int(entry['length']) if entry.get('length') is not None else None
+            except (ValueError, KeyError, TypeError) as error:
+                raise UserError('{}:{}: invalid plan entry ({})'.format(path, line_number, error))
+            if chosen:
+                yield PlanEntry(item_id, entry.get('title'), entry.get('rewritten'), length, str(chosen))
+
+
+def apply_plan(library: Library, entries: Iterable[PlanEntry], field: str = 'title_short',
+               journal: RunJournal | None = None, memo: bool = False) -> tuple[int, int]:
+    """Store short titles for many items in one transaction
+
+    Entries whose item is gone or was retitled since the plan was written
+    are skipped as stale. The replaced values are added to `journal` if
+    given, the chosen titles are remembered in the decision memo if `memo`
+    is set, and stored items leave the pending list, all in the same
+    transaction. Returns (stored, skipped).
+    """
+    entries = list(entries)
+    if memo:
+        DecisionMemo.create_table(library)
+    pending = PendingItems.exists(library)
+    with library.transaction() as tx:
+        current = [
+            entry for entry in entries
+            if tx.query('SELECT 1 FROM items WHERE id = ? AND title IS ?', (entry.id, entry.title))
+        ]
+        if journal is not None:
+            journal.record_flex_values(tx, field, [(entry.id, entry.chosen) for entry in current])
+        tx.mutate_many(
+            'INSERT INTO item_attributes (entity_id, key, value) VALUES (?, ?, ?)',
+            [(entry.id, field, entry.chosen) for entry in current]
+        )
+        if memo:
+            # Plans written before the length was recorded cannot be keyed
+            DecisionMemo.record(tx, [
+                (entry.rewritten, entry.length, entry.chosen)
+                for entry in current if entry.rewritten and entry.length is not None
+            ])
+        if pending:
+            tx.mutate_many(
+                'DELETE FROM {} WHERE item_id = ?'.format(PendingItems.table),
+                [(entry.id,) for entry in current]
+            )
+    return len(current), len(entries) - len(current)
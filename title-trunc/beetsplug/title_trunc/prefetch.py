@@ -0,0 +1,59 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class Prefetcher:
+    """Run `prepare` on upcoming items in worker threads
+
+    Iterating yields (item, prepared) pairs in the original order while up to
+    `ahead` later items are being prepared in the background, so the next
+    prompt is ready while the user is still choosing. Closing (or leaving the
+    `with` block, e.g. on Quit) cancels everything not yet started.
+    """
+
+    def __init__(
+            self,
+            items: Iterable[T],
+            prepare: Callable[[T], R],
+            ahead: int = 4,
+            workers: int = 1,
+    ):
+        self.items = iter(items)
+        self.prepare = prepare
+        self.ahead = max(ahead, 1)
+        self.executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='title-trunc')
+        self.pending: deque[tuple[T, Future]] = deque()
+
+    def _fill(self):
+        while len(self.pending) < self.ahead:
+            item = next(self.items, None)
+            if item is None:
+                return
+            self.pending.append((item, self.executor.submit(self.prepare, item)))
+
+    def __iter__(self) -> Iterator[tuple[T, R]]:
+        self._fill()
+        while self.pending:
+            item, future = self.pending.popleft()
+            self._fill()
+            yield item, future.result()
+
+    def close(self):
+        for _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -2,7 +2,6 @@
 #  Author: Scott Yeskie
 #  License: See LICENSE.txt
 
-import re
 from collections import namedtuple
 from math import floor
 
@@ -11,52 +10,110 @@ from beets.library import Library, Album, Item
 from beets.ui import colorize
 from yakh.key import Keys
 
+from beetsplug.title_trunc.auto_policy import AutoPolicy
+from beetsplug.title_trunc.path_budget import ComponentBudget
+from beetsplug.title_trunc.patterns import registry
+from beetsplug.title_trunc.separator_index import SeparatorIndex
+from beetsplug.title_trunc.substitutions import Substitutions, default_substitutions
+from beetsplug.title_trunc.timing import timings
+
 ellip = '…'
 rep_colon = '∶'
 
 SelOption = namedtuple('SelOption', ['pos', 'title'])
 
 
+def print_highlight_len(msg: str, length: int, track: int | None = None):
+    if track:
+        track_num = '{: >2}. '.format(track)
+    else:
+        track_num = ''
+    if len(msg) <= length:
+        track_title = colorize('yellow', msg)
+    else:
+        msg_trunc = msg[:length]
+        excess = msg[length:]
+        track_title = '{}{}'.format(colorize('yellow', msg_trunc), excess)
+    print('{}{}'.format(track_num, track_title))
+
+
 class SelectTrunc:
+    """Candidates for one long title and the prompt to pick between them"""
+    __slots__ = (
+        'album', 'album_tracks', 'budget', 'full_title', 'halflen', 'item', 'length', 'library',
+        'option_index', 'option_rules', 'options', 'prepared', 'separator_index', 'substitutions',
+        'title', 'title_short',
+    )
+
+    main_commands = (
+        SelOption('A', 'See Album'),
+        SelOption('S', 'Skip'),
+        SelOption('Q', 'Quit'),
+        SelOption(' ', 'Edit'),
+    )
+
+    edit_commands = (
+        SelOption(' ', '<Blank>'),
+    )
+
+    separators = ('–', rep_colon, '⁄', '？', 'ǀ', '⧵')
+
     def __init__(
             self,
             item: Item,
             library: Library,
             length: int,
-            # options: list[SelOption],
-            # title: str,
+            title: str | None = None,
+            substitutions: Substitutions | None = None,
+            budget: ComponentBudget | None = None,
     ):
-        self.main_commands = [
-            SelOption('A', 'See Album'),
-            SelOption('S', 'Skip'),
-            SelOption('Q', 'Quit'),
-            SelOption(' ', 'Edit'),
-        ]
-
-        self.edit_commands = [
-            SelOption(' ', '<Blank>')
-        ]
-
-        self.separators = ['–', rep_colon, '⁄', '？', 'ǀ', '⧵']
+        self.separator_index: SeparatorIndex | None = None
+        self.prepared = False
+        self.album: Album | None = None
+        self.album_tracks: list[Item] | None = None
 
         self.option_index = 0
-        self.options = []
+        self.options: list[SelOption] = []
+        self.option_rules: list[str] = []
         self.library = library
         self.item = item
         self.length = length
         self.halflen = floor(length / 2)
 
-        self.full_title = item.get('title')
+        self.substitutions = substitutions or default_substitutions()
+        self.full_title = title or item.get('title')
         self.title_short = item.get('title_short')
 
         # Do title replacements
         self.title = self._make_title_substitutions()
-        self.title_no_key = self._remove_key_from_title()
+
+        # Narrow the length to what fits the path component, leaving room for an ellipsis
+        self.budget = budget
+        if budget is not None and not budget.fits(self.title):
+            self.length = min(self.length, budget.char_limit(self.title, ellip))
+            self.halflen = floor(self.length / 2)
+
+    @property
+    def title_no_key(self) -> str:
+        return self._remove_key_from_title()
+
+    def needs_options(self) -> bool:
+        return len(self.title) > self.length
+
+    def prepare(self, with_album: bool = False):
+        """Do the work needed before prompting, so it can run ahead of time"""
+        if not self.prepared and self.needs_options():
+            with timings.timed('candidates'):
+                self._generate_options()
+            self.prepared = True
+        if with_album:
+            self._get_album_tracks()
+        return self
 
     def get_short_title(self) -> str:
-        if len(self.title) <= self.length:
+        if not self.needs_options():
             return self.title
-        self._generate_options()
+        self.prepare()
         selected = self._user_select_main()
         if selected is None:
             print(colorize('red', 'Skip'))
@@ -64,44 +121,70 @@ class SelectTrunc:
             print(colorize('green', selected))
         return selected
 
-    def _generate_options(self):
-        no_paren = re.sub(r'(\s*)\([^)]*\)(\s*)', '\1\2', self.title).replace('  ', ' ')
-        if no_paren == self.title or len(no_paren) > self.length:
-            no_paren = None
+    def get_auto_short_title(self, policy: AutoPolicy) -> tuple[str | None, str]:
+        """Pick the best candidate using `policy` instead of prompting
+
+        Returns the chosen title (None if there was no candidate) and the name
+        of the rule that produced it.
+        """
+        if not self.needs_options():
+            return self.title, 'substitution'
+        self.prepare()
+        with timings.timed('choose'):
+            return policy.choose(self.title, self.length, self.options, self.option_rules)
 
+    def _generate_options(self):
         # Existing title
-        self.add_option(self.title_short, key=0)
+        self.add_option(self.title_short, key=0, rule='existing')
         # Ellipsis at end
-        self.add_option(self.title[0:self.length - 1] + ellip)
+        self.add_option(self.title[0:self.length - 1] + ellip, rule='ellipsis_end')
         # Split in half and put ellipsis in middle
-        self.add_option(''.join([self.title[:self.halflen - 1], ellip, self.title[-self.halflen:]]))
-        self._add_truncate_at_separator_option(['∶'], self.title)
-        self._add_truncate_at_separator_option(self.separators, self.title)
-        self.add_option(no_paren)
+        self.add_option(
+            ''.join([self.title[:self.halflen - 1], ellip, self.title[-self.halflen:]]),
+            rule='ellipsis_middle'
+        )
+        self.separator_index = SeparatorIndex(self.title, self.separators)
+        self._add_truncate_at_separator_option(rep_colon, 'colon')
+        self._add_truncate_at_separator_option(None, 'separator')
+        no_paren = registry['paren_strip'].sub(r'\1\2', self.title).replace('  ', ' ').strip()
+        if no_paren != self.title and len(no_paren) <= self.length:
+            self.add_option(no_paren, rule='no_paren')
         self._add_truncate_after_last_colon_leave_paren_option()
-
-    def _add_truncate_at_separator_option(self, separators: list[str], msg: str):
-        rev_threshold = len(msg) - self.length
-        first_sep = len(msg) + 1  # Find the smallest location >= (len(title) - length)
-        last_sep = -1  # Find the largest location <= length
-        for sep in separators:
-            pos = 0
-            while pos < len(msg):
-                pos = msg.find(sep, pos)
-                if pos == -1:
-                    break
-                if last_sep < pos < self.length:
-                    last_sep = pos
-                pos += 1
-                if rev_threshold < pos < first_sep:
-                    first_sep = pos
-        if first_sep < len(msg):
-            self.add_option(msg[first_sep:].strip())
+        if self.budget is not None:
+            self._drop_options_over_budget()
+
+    def _drop_options_over_budget(self):
+        """Size the candidates in one call, drop those over the budget and renumber the rest"""
+        sizes = self.budget.sizes([option.title for option in self.options])
+        kept = [
+            (option.title, rule)
+            for option, rule, size in zip(self.options, self.option_rules, sizes)
+            if size <= self.budget.max_bytes
+        ]
+        self.options, self.option_rules, self.option_index = [], [], 0
+        for text, rule in kept:
+            # The existing title keeps key 0
+            if rule != 'existing':
+                self.option_index += 1
+            self.options.append(SelOption(0 if rule == 'existing' else self.option_index, text))
+            self.option_rules.append(rule)
+
+    def _add_truncate_at_separator_option(self, separator: str | None, rule: str):
+        """Cut after the first separator leaving at most `length` characters,
+        and before the last separator within the first `length` characters
+
+        `separator` None means any of the separators
+        """
+        msg = self.title
+        first_sep = self.separator_index.first_from(len(msg) - self.length, separator)
+        if -1 < first_sep < len(msg) - 1:
+            self.add_option(msg[first_sep + 1:].strip(), rule='{}_tail'.format(rule))
+        last_sep = self.separator_index.last_before(self.length, separator)
         if last_sep > 0:
-            self.add_option(msg[:last_sep].strip())
+            self.add_option(msg[:last_sep].strip(), rule='{}_head'.format(rule))
 
     def _add_truncate_after_last_colon_leave_paren_option(self):
-        paren_groups = re.findall(r'\([^)]+\)', self.title)
+        paren_groups = registry['paren_group'].findall(self.title)
         if len(paren_groups) == 0:
             return None  # No parenthesis
 
@@ -110,27 +193,21 @@ class SelectTrunc:
         if shortlen <= self.halflen:
             return None  # Parenthesis group over half the length
 
-        colon_at = self.title.rfind(rep_colon, 0, shortlen)
+        colon_at = self.separator_index.last_before(shortlen, rep_colon)
         if colon_at < 1:
             return None  # No colon to replace
 
-        self.add_option('{} {}'.format(self.title[:colon_at], last_paren))
+        self.add_option('{} {}'.format(self.title[:colon_at], last_paren), rule='colon_keep_paren')
 
-    def add_option(self, text, key=None):
+    def add_option(self, text, key=None, rule=None):
         if not text:
             return
-        if not key:
+        text = registry['ellipsis_word'].sub(ellip, text)
+        if key is None:
             self.option_index += 1
-        self.options.append(
-            SelOption(
-                key or self.option_index,
-                re.sub(
-                    r'[\w․.″\',”’？!&#«»]*…[\w․.″\',”’？!&#«»]*',
-                    '…',
-                    text
-                )
-            )
-        )
+            key = self.option_index
+        self.option_rules.append(rule)
+        self.options.append(SelOption(key, text))
 
     @staticmethod
     def _format_option(option: (int | str, str)) -> str:
@@ -140,41 +217,10 @@ class SelectTrunc:
             return '{}. {}'.format(option[0], option[1])
 
     def _make_title_substitutions(self) -> str:
-        repl_map = {  # Todo: move this to configuration
-            # Include character mapping
-            ':': '∶',
-            '/': " ⁄ ",
-            '*': "∗",
-            '?': "？",
-            '"': '″',
-            '.': '․',
-            '|': 'ǀ',
-            '<': '‹',
-            '>': '›',
-            '\\': '⧵',
-            # Consolidate symbols
-            '—': '–',
-            '―': '–',
-            '»': '“',
-            '«': '“',
-            # Shortening
-            'No․': '#',
-            ' no․': ' #',
-            'NO․': '#',
-            '# ': '#',
-            '...': ellip,
-            # Space trimming
-            '    ': ' ',
-            '   ': ' ',
-            '  ': ' ',
-        }
-        rep_title = self.full_title.strip()
-        for key, rep in repl_map.items():
-            rep_title = rep_title.replace(key, rep)
-        return rep_title
+        return self.substitutions.apply(self.full_title.strip())
 
     def _remove_key_from_title(self) -> str:
-        return re.sub(' in [A-G][^∶]+∶', '∶', self.title)
+        return registry['key'].sub(rep_colon, self.title)
 
     def _user_select_main(self):
         if len(self.options) == 0:
@@ -184,19 +230,21 @@ class SelectTrunc:
 
         self._print_highlight_len(self.title)
 
-        main_result = select(
-            options=self.options + self.main_commands,
-            preprocessor=self._format_option,
-            cursor_style='cyan1',
-        )
+        with timings.timed('prompt'):
+            main_result = select(
+                options=[*self.options, *self.main_commands],
+                preprocessor=self._format_option,
+                cursor_style='cyan1',
+            )
 
         match main_result:
             case (_, 'Skip'):
                 return None
             case ('A', _):
-                album: Album = self.library.get_album(self.item)
-                print("\n{}".format(colorize('cyan', album.get('album'))))
-                for track in album.items():
+                album_tracks = self._get_album_tracks()
+                if self.album is not None:
+                    print("\n{}".format(colorize('cyan', self.album.get('album'))))
+                for track in album_tracks:
                     self._print_highlight_len(track.title, track.track)
                 return self._user_select_main()
             case (_, 'Quit'):
@@ -212,12 +260,18 @@ class SelectTrunc:
             case _:
                 exit(2)
 
+    def _get_album_tracks(self) -> list[Item]:
+        if self.album_tracks is None:
+            with timings.timed('album'):
+                self.album = self.library.get_album(self.item)
+                self.album_tracks = list(self.album.items()) if self.album is not None else []
+        return self.album_tracks
+
+    @timings.timer('prompt')
     def _user_select_edit(self):
         edit_default = select(
             preprocessor=self._format_option,
-            options=[SelOption(0, self.title)]
-                    + self.options
-                    + self.edit_commands,
+            options=[SelOption(0, self.title), *self.options, *self.edit_commands],
             cursor_style='yellow1'
         )
 
@@ -232,27 +286,8 @@ class SelectTrunc:
         )
         return result
 
-    # TODO: Modify album
-    # 6. Concerto for Piano and Orchestra No․ 2 in B-flat major, Op․ 19∶ III․ Rondo․ Allegro molto
-    # 1. Concerto for Piano and Orchestra No․ 1 in C major, Op․ 15∶ I․ Allegro con brio
-    # 2. Concerto for Piano and Orchestra No․ 1 in C major, Op․ 15∶ II․ Largo
-    # 3. Concerto for Piano and Orchestra No․ 1 in C major, Op․ 15∶ III․ Rondo․ Allegro
-    # 4. Concerto for Piano and Orchestra No․ 2 in B-flat major, Op․ 19∶ I․ Allegro con brio
-    # 5. Concerto for Piano and Orchestra No․ 2 in B-flat major, Op․ 19∶ II․ Adagio
-    # Would want to do a replace "Concerto for Piano and Orchestra" with "Piano Concerto"
-
     def _print_highlight_len(self, msg: str, track: int | None = None):
-        if track:
-            track_num = '{: >2}. '.format(track)
-        else:
-            track_num = ''
-        if len(msg) <= self.length:
-            track_title = colorize('yellow', msg)
-        else:
-            msg_trunc = msg[:self.length]
-            excess = msg[self.length:]
-            track_title = '{}{}'.format(colorize('yellow', msg_trunc), excess)
-        print('{}{}'.format(track_num, track_title))
+        print_highlight_len(msg, self.length, track)
 
     @staticmethod
     def _prep_keys_main():
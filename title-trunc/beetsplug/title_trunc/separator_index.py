@@ -0,0 +1,45 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _separator_pattern(separators: tuple[str, ...]) -> re.Pattern:
+    return re.compile('|'.join(re.escape(sep) for sep in separators))
+
+
+class SeparatorIndex:
+    """Sorted positions of every separator in a title, from a single scan
+
+    Positions are kept for all separators together and for each separator on
+    its own, so any "nearest separator" question is one bisect.
+    """
+
+    def __init__(self, title: str, separators: tuple[str, ...]):
+        self.positions: list[int] = []
+        self.by_separator: dict[str, list[int]] = {sep: [] for sep in separators}
+        for match in _separator_pattern(separators).finditer(title):
+            pos = match.start()
+            self.positions.append(pos)
+            self.by_separator[match.group(0)].append(pos)
+
+    def _positions(self, separator: str | None) -> list[int]:
+        if separator is None:
+            return self.positions
+        return self.by_separator.get(separator, [])
+
+    def last_before(self, end: int, separator: str | None = None) -> int:
+        """Largest separator position < end, or -1"""
+        positions = self._positions(separator)
+        index = bisect_left(positions, end)
+        return positions[index - 1] if index > 0 else -1
+
+    def first_from(self, start: int, separator: str | None = None) -> int:
+        """Smallest separator position >= start, or -1"""
+        positions = self._positions(separator)
+        index = bisect_left(positions, start)
+        return positions[index] if index < len(positions) else -1
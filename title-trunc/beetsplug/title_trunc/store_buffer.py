@@ -0,0 +1,67 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+from time import monotonic
+from typing import Callable
+
+from beets.dbcore.db import Transaction
+from beets.library import Library, Item
+
+from beetsplug.title_trunc.timing import timings
+
+
+class StoreBuffer:
+    """Write-behind queue for item updates.
+
+    Updates are applied to the item right away but only stored once the
+    buffer is flushed, all inside a single library transaction. The buffer
+    flushes itself when `batch_size` items are pending or `interval` seconds
+    have passed since the last flush. Functions in `flush_hooks` are called
+    with the transaction so related writes are committed along with the items;
+    functions in `change_hooks` see each item and its values before the update.
+    """
+
+    def __init__(self, library: Library, batch_size: int = 50, interval: float = 30.0):
+        self.library = library
+        self.batch_size = max(batch_size, 1)
+        self.interval = interval
+        self.pending: dict[int, Item] = {}
+        self.last_flush = monotonic()
+        self.flush_hooks: list[Callable[[Transaction], None]] = []
+        self.change_hooks: list[Callable[[Item, dict], None]] = []
+
+    def add(self, item: Item, values: dict):
+        for hook in self.change_hooks:
+            hook(item, values)
+        item.update(values)
+        self.pending[item.id] = item
+        if self._is_due():
+            self.flush()
+
+    def flush(self) -> int:
+        count = len(self.pending)
+        if count:
+            with timings.timed('store'), self.library.transaction() as tx:
+                for item in self.pending.values():
+                    item.store()
+                for hook in self.flush_hooks:
+                    hook(tx)
+            self.pending.clear()
+        self.last_flush = monotonic()
+        return count
+
+    def _is_due(self) -> bool:
+        if len(self.pending) >= self.batch_size:
+            return True
+        return self.interval > 0 and monotonic() - self.last_flush >= self.interval
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Flush on normal exit, Quit (SystemExit) and Ctrl-C alike
+        self.flush()
@@ -0,0 +1,76 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+from unittest import mock
+
+from beets.library import Item
+
+from beetsplug.title_trunc.album_trunc import AlbumTrunc, common_prefix
+from beetsplug.title_trunc.auto_policy import AutoPolicy
+from beetsplug.title_trunc.command import TitleTruncCommand
+from beetsplug.title_trunc.store_buffer import StoreBuffer
+from beetsplug.title_trunc.substitutions import Substitutions
+from test.helper import LibraryMixin
+
+
+class CommonPrefixTest(unittest.TestCase):
+    def test_word_boundary(self):
+        self.assertEqual('Concerto for Piano and Orchestra', common_prefix([
+            'Concerto for Piano and Orchestra #1 in C major, Op․ 15∶ I․ Allegro con brio',
+            'Concerto for Piano and Orchestra #1 in C major, Op․ 15∶ II․ Largo',
+            'Concerto for Piano and Orchestra #2 in B-flat major, Op․ 19∶ II․ Adagio',
+        ]))
+
+    def test_full_word_match(self):
+        self.assertEqual('Symphony #9∶', common_prefix([
+            'Symphony #9∶ I․ Allegro',
+            'Symphony #9∶ II․ Molto vivace',
+        ]))
+
+    def test_no_prefix(self):
+        self.assertEqual('', common_prefix(['Alpha', 'Beta']))
+        self.assertEqual('', common_prefix(['Alphabet', 'Alphanumeric']))
+        self.assertEqual('', common_prefix(['Single title']))
+
+
+class AlbumTruncTest(unittest.TestCase):
+    def test_rewrite(self):
+        items = [
+            Item(id=1, title='Concerto for Piano and Orchestra No. 1 in C major, Op. 15: I. Allegro con brio'),
+            Item(id=2, title='Concerto for Piano and Orchestra No. 1 in C major, Op. 15: II. Largo'),
+        ]
+        album = AlbumTrunc(items=items, library=None, length=50)
+        self.assertEqual('Concerto for Piano and Orchestra #1 in C major, Op․ 15∶', album.prefix)
+        self.assertEqual({
+            1: 'Piano Concerto #1∶ I․ Allegro con brio',
+            2: 'Piano Concerto #1∶ II․ Largo',
+        }, album.rewrite('Piano Concerto #1∶'))
+
+
+class AutoAlbumTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = [
+            Item(title='Concerto for Piano and Orchestra No. 1 in C major, Op. 15: I. Allegro con brio'),
+            Item(title='Concerto for Piano and Orchestra No. 1 in C major, Op. 15: II. Largo'),
+        ]
+        self.album = self.lib.add_album(self.items)
+
+    def test_auto_does_not_prompt(self):
+        command = TitleTruncCommand(None)
+        command.lib = self.lib
+        command.cfg_auto = True
+        command.cfg_length = 50
+        command.substitutions = Substitutions(())
+        command.auto_policy = AutoPolicy()
+        with StoreBuffer(self.lib) as command.store_buffer, \
+                mock.patch('beetsplug.title_trunc.album_trunc.prompt', side_effect=AssertionError('prompted')):
+            command.process_album_items(self.album.id, self.items)
+        for item in self.items:
+            self.assertLessEqual(len(self.lib.get_item(item.id).get('title_short')), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.library import Item
+
+from beetsplug.title_trunc.auto_policy import AutoPolicy
+from beetsplug.title_trunc.select_trunc import SelectTrunc
+
+
+class AutoPolicyTest(unittest.TestCase):
+    def _auto(self, title, length, policy=None):
+        selector = SelectTrunc(item=Item(title=title), library=None, length=length)
+        return selector.get_auto_short_title(policy or AutoPolicy())
+
+    def test_short_title_kept(self):
+        self.assertEqual(('Short', 'substitution'), self._auto('Short', 20))
+
+    def test_keeps_last_paren(self):
+        title, rule = self._auto('Symphony No. 5: I. Allegro con brio (Live at the Hall)', 45)
+        self.assertEqual('colon_keep_paren', rule)
+        self.assertEqual('Symphony #5 (Live at the Hall)', title)
+
+    def test_prefers_separator_over_ellipsis(self):
+        title, rule = self._auto('The first part of the title: and the second one', 30)
+        self.assertEqual('colon_head', rule)
+        self.assertEqual('The first part of the title', title)
+
+    def test_ellipsis_fallback(self):
+        title, rule = self._auto('This is the end of the world as we know it', 20)
+        self.assertIn(rule, ('ellipsis_end', 'ellipsis_middle'))
+        self.assertLessEqual(len(title), 20)
+
+    def test_configured_rule_weight(self):
+        policy = AutoPolicy(rules={'ellipsis_end': 1000})
+        title, rule = self._auto('The first part of the title: and the second one', 30, policy)
+        self.assertEqual('ellipsis_end', rule)
+        self.assertEqual({'ellipsis_end': 1}, dict(policy.summary))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.candidates_bench [COUNT] [LENGTH]
+
+import re
+import sys
+from time import perf_counter
+
+from beets.library import Item
+
+from beetsplug.title_trunc.select_trunc import SelectTrunc
+from test.benchmark.corpus import titles
+
+
+def generate(items: list[Item], length: int, purge_re_cache: bool = False) -> float:
+    start = perf_counter()
+    for item in items:
+        if purge_re_cache:
+            # Other plugins compiling their own patterns churn the re cache
+            re.purge()
+        selector = SelectTrunc(item=item, library=None, length=length)
+        selector.prepare()
+    return perf_counter() - start
+
+
+def main(count: int = 20000, length: int = 50):
+    items = [Item(title=title) for title in titles(count)]
+    generate(items[:100], length)  # Warm up
+
+    for label, purge in [('warm re cache', False), ('re cache purged per item', True)]:
+        seconds = generate(items, length, purge)
+        print('{: <26} {:.1f} µs/item ({:,.0f} items/s)'.format(
+            label, seconds / count * 1e6, count / seconds))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
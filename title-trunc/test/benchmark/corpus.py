@@ -0,0 +1,32 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import random
+
+works = [
+    'Concerto for Piano and Orchestra No. {n} in {key}, Op. {op}',
+    'Symphony No. {n} in {key}, Op. {op} "{nick}"',
+    'String Quartet no. {n} in {key}, Op. {op}/{m}',
+    'Sonata for Violin and Piano No. {n} in {key}, BWV {op}',
+    'Mass in {key}, K. {op}',
+    'Suite No. {n} for Solo Cello in {key} - {nick}',
+]
+keys = ['C major', 'B-flat major', 'D minor', 'E-flat major', 'F-sharp minor', 'A major']
+nicks = ['Eroica', 'Pastoral', 'Jupiter', 'The Lark', 'From the New World', 'Unfinished']
+movements = [
+    'I. Allegro con brio', 'II. Largo', 'III. Rondo. Allegro molto', 'IV. Finale: Presto...',
+    'II. Adagio — Andante', 'Menuetto & Trio (Allegretto)', 'Recitativo: "Ach, mein Sinn"',
+    'Tempo di minuetto | Trio', 'I.  Molto  vivace (Live at the Hall, 1962)',
+]
+
+
+def titles(count: int, seed: int = 1):
+    """Deterministic classical-style titles, most of them well over 50 characters"""
+    rnd = random.Random(seed)
+    for _ in range(count):
+        work = rnd.choice(works).format(
+            n=rnd.randint(1, 9), key=rnd.choice(keys), op=rnd.randint(1, 130),
+            m=rnd.randint(1, 6), nick=rnd.choice(nicks),
+        )
+        yield '{}: {}'.format(work, rnd.choice(movements))
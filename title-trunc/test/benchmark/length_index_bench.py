@@ -0,0 +1,52 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.length_index_bench [COUNT] [LENGTH]
+
+import sys
+from time import perf_counter
+
+from beetsplug.title_trunc.item_stream import count_items, stream_items
+from beetsplug.title_trunc.length_index import ensure_length_index, drop_length_index
+from beetsplug.title_trunc.length_query import OverMaxLengthQuery
+from test.benchmark.library import scratch_dir, synthetic_library
+
+
+def measure(lib, query, runs: int = 5) -> dict[str, float]:
+    where, subvals = query.clause()
+    with lib.transaction() as tx:
+        plan = ' / '.join(row[3] for row in tx.query('EXPLAIN QUERY PLAN SELECT id FROM items WHERE ' + where, subvals))
+    start = perf_counter()
+    for _ in range(runs):
+        total = count_items(lib, query)
+    count_seconds = (perf_counter() - start) / runs
+    start = perf_counter()
+    first = next(stream_items(lib, query))
+    first_seconds = perf_counter() - start
+    return {'plan': plan, 'total': total, 'count': count_seconds, 'first': first_seconds, 'first_id': first.id}
+
+
+def main(count: int = 1000000, length: int = 50):
+    with scratch_dir() as path:
+        start = perf_counter()
+        lib = synthetic_library(path, count)
+        print('{:,} items created in {:.1f}s'.format(count, perf_counter() - start))
+        query = OverMaxLengthQuery('title', str(length))
+
+        drop_length_index(lib, 'title')
+        before = measure(lib, query)
+        start = perf_counter()
+        ensure_length_index(lib, 'title')
+        print('index created in {:.2f}s'.format(perf_counter() - start))
+        after = measure(lib, query)
+
+        assert before['total'] == after['total'] and before['first_id'] == after['first_id']
+        for label, result in (('no index', before), ('length index', after)):
+            print('{: <13} COUNT(*) {:7.1f} ms, first item {:7.1f} ms  [{}]'.format(
+                label, result['count'] * 1000, result['first'] * 1000, result['plan']))
+        print('{:,} titles over {}'.format(after['total'], length))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,38 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.length_query_bench [COUNT] [LENGTH]
+
+import sys
+from time import perf_counter
+
+from beetsplug.title_trunc.length_query import OverMaxLengthQuery, WithinMaxLengthQuery
+from test.benchmark.library import scratch_dir, synthetic_library
+
+
+def timed(func):
+    start = perf_counter()
+    result = func()
+    return result, perf_counter() - start
+
+
+def main(count: int = 20000, length: int = 50):
+    with scratch_dir() as path:
+        lib = synthetic_library(path, count, long_ratio=0.5)
+        items, load_seconds = timed(lambda: list(lib.items()))
+        print('{:,} items loaded in {:.2f}s'.format(count, load_seconds))
+
+        for query in (OverMaxLengthQuery('title', str(length)), WithinMaxLengthQuery('title', str(length))):
+            sql, sql_seconds = timed(lambda: [item.id for item in lib.items(query)])
+            per_item, match_seconds = timed(lambda: [item.id for item in items if query.match(item)])
+            batch, batch_seconds = timed(lambda: [item.id for item in query.filter_many(items)])
+            assert sql == per_item == batch
+
+            print('{} ({:,} matches)'.format(type(query).__name__, len(sql)))
+            for label, seconds in (('sql', sql_seconds), ('match', match_seconds), ('match_many', batch_seconds)):
+                print('  {: <11} {:8.1f} ms'.format(label, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
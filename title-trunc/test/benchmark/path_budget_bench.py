@@ -0,0 +1,45 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.path_budget_bench [COUNT]
+
+import os
+import sys
+from timeit import timeit
+
+from beets.library import Library, Item
+
+from beetsplug.title_trunc.path_budget import PathBudget
+from test.benchmark.corpus import titles
+from test.benchmark.library import scratch_dir
+
+
+def main(count: int = 10000):
+    with scratch_dir() as path:
+        lib = Library(os.path.join(path, 'library.db'), path)
+        lib.path_formats = [('default', '$albumartist/$album/%if{$disc,$disc-}$track $title_short')]
+        item = Item(title='A title', albumartist='Artist', album='Album', track=3, path=b'/music/file.flac')
+        lib.add(item)
+        candidates = list(titles(count))
+        budget = PathBudget(lib, 255).for_item(item)
+
+        def destination_sizes():
+            sizes = []
+            for candidate in candidates:
+                item['title_short'] = candidate
+                sizes.append(len(os.path.basename(item.destination(relative_to_libdir=True))))
+            return sizes
+
+        assert destination_sizes() == budget.sizes(candidates)
+        timings = [
+            ('destination', timeit(destination_sizes, number=1)),
+            ('budget.sizes', timeit(lambda: budget.sizes(candidates), number=1)),
+        ]
+        print('{:,} candidates'.format(count))
+        for name, seconds in timings:
+            print('{: <13} {:.3f}s ({:,.0f} candidates/s)'.format(name, seconds, count / seconds))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,46 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.selector_memory_bench [COUNT] [LENGTH]
+
+import sys
+import tracemalloc
+
+from beets.library import Item
+
+from beetsplug.title_trunc.select_trunc import SelectTrunc
+from test.benchmark.corpus import titles
+
+
+def traced(func) -> tuple[int, int, int]:
+    """Bytes still held after func, peak bytes and allocations made while it ran"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename')
+                 if stat.count_diff > 0)
+    tracemalloc.stop()
+    del result
+    return current, peak, blocks
+
+
+def main(count: int = 100000, length: int = 50):
+    items = [Item(title=title) for title in titles(count)]
+
+    def selectors():
+        return [SelectTrunc(item=item, library=None, length=length) for item in items]
+
+    def prepared():
+        return [SelectTrunc(item=item, library=None, length=length).prepare() for item in items]
+
+    print('{:,} items, length {}'.format(count, length))
+    for label, func in (('selectors', selectors), ('prepared', prepared)):
+        current, peak, blocks = traced(func)
+        print('{: <13} held {:7.1f} MB ({:4.0f} B/item), peak {:7.1f} MB, {:6.1f} allocations/item'.format(
+            label, current / 1e6, current / count, peak / 1e6, blocks / count))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,60 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.substitutions_bench [COUNT]
+
+import re
+import sys
+from timeit import timeit
+
+from beetsplug.title_trunc.substitutions import default_substitutions
+from test.benchmark.corpus import titles
+
+
+def original_substitutions(title: str) -> str:
+    """SelectTrunc._make_title_substitutions before the rules moved to config"""
+    repl_map = {
+        ':': '∶', '/': " ⁄ ", '*': "∗", '?': "？", '"': '″', '.': '․', '|': 'ǀ',
+        '<': '‹', '>': '›', '\\': '⧵', '—': '–', '―': '–', '»': '“', '«': '“',
+        'No․': '#', ' no․': ' #', 'NO․': '#', '# ': '#', '...': '…',
+        '    ': ' ', '   ': ' ', '  ': ' ',
+    }
+    rep_title = title.strip()
+    for key, rep in repl_map.items():
+        rep_title = rep_title.replace(key, rep)
+    return rep_title
+
+
+def single_pass(rules):
+    """translate table for the single characters, one alternation for the rest
+
+    Only equivalent for the default rules: the multi-character rules chain
+    ('No․' -> '#' then '# ' -> '#'), so this is run for timing only.
+    """
+    table = str.maketrans({key: value for key, value in rules if len(key) == 1})
+    lookup = {key: value for key, value in rules if len(key) > 1}
+    pattern = re.compile('|'.join(re.escape(key) for key in lookup))
+    return lambda title: pattern.sub(lambda match: lookup[match.group(0)], title.translate(table))
+
+
+def main(count: int = 100000):
+    corpus = list(titles(count))
+    substitutions = default_substitutions()
+    translate_regex = single_pass(substitutions.rules)
+
+    assert [original_substitutions(title) for title in corpus] == \
+           [substitutions.apply(title.strip()) for title in corpus]
+
+    timings = [
+        ('original', timeit(lambda: [original_substitutions(title) for title in corpus], number=1)),
+        ('translate+regex', timeit(lambda: [translate_regex(title.strip()) for title in corpus], number=1)),
+        ('compiled', timeit(lambda: [substitutions.apply(title.strip()) for title in corpus], number=1)),
+    ]
+    print('{} titles, {} rules'.format(count, len(substitutions.rules)))
+    for name, seconds in timings:
+        print('{: <16} {:.3f}s ({:,.0f} titles/s)'.format(name, seconds, count / seconds))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,138 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+#
+#  Run with: python -m test.benchmark.suite [--sizes 10000,100000,1000000] [--output FILE] [--compare FILE]
+
+import json
+import platform
+import subprocess
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+from time import perf_counter
+from typing import Callable
+
+import beets
+
+from beetsplug.title_trunc.command import TitleTruncCommand
+from beetsplug.title_trunc.select_trunc import SelectTrunc
+from beetsplug.title_trunc.store_buffer import StoreBuffer
+from test.benchmark.library import scratch_dir, synthetic_library
+
+# Classical libraries: a good share of titles are over the limit
+long_ratio = 0.3
+length = 50
+# Per-item steps run on at most this many items, so 1M stays in minutes
+max_selectors = 100000
+max_stored = 20000
+
+
+def best_of(func: Callable, repeat: int = 3) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        seconds.append(perf_counter() - start)
+    return min(seconds)
+
+
+def make_command(lib, stream_chunk: int = 500) -> TitleTruncCommand:
+    command = TitleTruncCommand(None)
+    command.lib = lib
+    command.query = []
+    command.cfg_length = length
+    command.cfg_stream_chunk = stream_chunk
+    return command
+
+
+def retrieve(command: TitleTruncCommand) -> list:
+    items, _ = command.retrieve_library_items()
+    return list(items)
+
+
+def run_size(count: int) -> dict:
+    results = {}
+
+    def record(name: str, seconds: float, items: int):
+        results[name] = {'seconds': seconds, 'items': items, 'us_per_item': seconds / max(items, 1) * 1e6}
+        print('  {: <26} {:9.3f}s {:9.1f} µs/item ({:,} items)'.format(
+            name, seconds, results[name]['us_per_item'], items))
+
+    with scratch_dir() as path:
+        start = perf_counter()
+        lib = synthetic_library(path, count, long_ratio=long_ratio)
+        print('{:,} items ({:.1f}s to build)'.format(count, perf_counter() - start))
+
+        streamed, loaded = make_command(lib, 500), make_command(lib, 0)
+        items = retrieve(streamed)
+        record('retrieve_streamed', best_of(lambda: retrieve(streamed)), len(items))
+        record('retrieve_loaded', best_of(lambda: retrieve(loaded)), len(items))
+
+        items = items[:max_selectors]
+        selectors = [SelectTrunc(item=item, library=lib, length=length) for item in items]
+        record('make_title_substitutions',
+               best_of(lambda: [selector._make_title_substitutions() for selector in selectors]), len(items))
+        record('generate_options', best_of(
+            lambda: [SelectTrunc(item=item, library=lib, length=length).prepare() for item in items], 1
+        ), len(items))
+
+        stored = items[:max_stored]
+
+        def store():
+            with StoreBuffer(lib, batch_size=50, interval=0) as buffer:
+                for index, item in enumerate(stored):
+                    buffer.add(item, {'title_short': 'Short {}'.format(index)})
+        record('store_batched', best_of(store, 1), len(stored))
+    return results
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old: dict, new: dict, tolerance: float = 0.1):
+    print('\nCompared with {} ({}):'.format(old['commit'], old['created']))
+    for size, benchmarks in new['results'].items():
+        for name, result in benchmarks.items():
+            before = old['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            ratio = result['us_per_item'] / before['us_per_item']
+            flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+            print('  {: >9} {: <26} {:6.2f}x {}'.format(size, name, ratio, flag))
+
+
+def main(argv: list[str]):
+    parser = ArgumentParser(description='title-trunc benchmarks on synthetic libraries')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--output', help='JSON results file (default benchmark-COMMIT.json)')
+    parser.add_argument('--compare', help='earlier JSON results to compare with')
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'beets': beets.__version__,
+        'results': {},
+    }
+    for size in (int(size) for size in args.sizes.split(',')):
+        report['results'][str(size)] = run_size(size)
+
+    output = args.output or 'benchmark-{}.json'.format(report['commit'])
+    with open(output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2)
+    print('Results written to {}'.format(output))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as old_file:
+            compare(json.load(old_file), report)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -118,6 +118,26 @@ class Assertions(object):
                             displayable_path(path)))
 
 
+class TempDirMixin(object):
+    """A temporary directory for each test, removed afterwards, as `self.tmpdir`"""
+
+    def setUp(self):
+        super(TempDirMixin, self).setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def tmp_path(self, name: str) -> str:
+        return os.path.join(self.tmpdir.name, name)
+
+
+class LibraryMixin(TempDirMixin):
+    """A new library database in the temporary directory, as `self.lib`"""
+
+    def setUp(self):
+        super(LibraryMixin, self).setUp()
+        self.lib = beets.library.Library(self.tmp_path('library.db'), self.tmpdir.name)
+
+
 class TestHelper(TestCase, Assertions):
     _test_config_dir_ = os.path.join(bytestring_path(os.path.dirname(__file__)),
                                      b'config')
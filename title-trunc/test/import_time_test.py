@@ -0,0 +1,51 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import os
+import subprocess
+import sys
+import unittest
+from statistics import median
+
+package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What beets has imported by the time plugins are loaded
+preloaded = 'import beets.library, beets.plugins, beets.ui, confuse'
+# Measured against beets.ui in the same run, so a slow machine scales both;
+# about 0.7-1x locally, importing the prompt libraries would take it past 2x
+baseline_module = 'beets.ui'
+budget_ratio = float(os.environ.get('TITLE_TRUNC_IMPORT_BUDGET_RATIO', 2))
+heavy_modules = ('beaupy', 'yakh', 'rich')
+
+
+def import_times(module: str) -> dict[str, float]:
+    """Cumulative import time in ms per module, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '{}; import {}'.format(preloaded, module)],
+        cwd=package_root, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_plugin_import_within_budget(self):
+        runs = [import_times('beetsplug.title_trunc') for _ in range(3)]
+        elapsed = median(run['beetsplug.title_trunc'] for run in runs)
+        baseline = median(run[baseline_module] for run in runs)
+        self.assertLess(elapsed, baseline * budget_ratio, '{:.1f} ms, {} took {:.1f} ms'.format(
+            elapsed, baseline_module, baseline))
+
+    def test_prompt_libraries_not_imported(self):
+        imported = import_times('beetsplug.title_trunc')
+        self.assertEqual([], [name for name in imported if name.split('.')[0] in heavy_modules])
+
+
+if __name__ == '__main__':
+    unittest.main()
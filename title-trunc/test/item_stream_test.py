@@ -0,0 +1,41 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.dbcore.query import RegexpQuery
+from beets.library import Item
+
+from beetsplug.title_trunc.item_stream import count_items, stream_items
+from beetsplug.title_trunc.length_query import FlexOverMaxLengthQuery, OverMaxLengthQuery
+from test.helper import LibraryMixin
+
+
+class ItemStreamTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            self.lib.add(Item(title='{} {}'.format('Long title' if i % 2 else 'Short', i)))
+
+    def test_count(self):
+        self.assertEqual(12, count_items(self.lib, OverMaxLengthQuery('title', '8')))
+        self.assertIsNone(count_items(self.lib, RegexpQuery('title', 'Long', fast=False)))
+
+    def test_stream_in_chunks(self):
+        query = OverMaxLengthQuery('title', '8')
+        ids = [item.id for item in stream_items(self.lib, query, chunk_size=5)]
+        self.assertEqual(sorted(item.id for item in self.lib.items(query)), ids)
+
+    def test_processed_items_do_not_shift_chunks(self):
+        query = FlexOverMaxLengthQuery('title_short', '8')
+        seen = []
+        for item in stream_items(self.lib, query, chunk_size=4):
+            seen.append(item.id)
+            item['title_short'] = 'done'
+            item.store()
+        self.assertEqual(list(range(1, 26)), seen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.library import Item
+from beets.ui import UserError
+
+from beetsplug.title_trunc.journal import RunJournal
+from beetsplug.title_trunc.plan import PlanEntry, apply_plan
+from beetsplug.title_trunc.store_buffer import StoreBuffer
+from test.helper import LibraryMixin
+
+
+class RunJournalTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = [Item(title='Long title {}'.format(index)) for index in range(3)]
+        for item in self.items:
+            self.lib.add(item)
+        self.items[0]['title_short'] = 'Old'
+        self.items[0].store()
+
+    def short_titles(self) -> list:
+        return [item.get('title_short') for item in self.lib.items()]
+
+    def run_buffered(self, values: list[str]) -> RunJournal:
+        journal = RunJournal(self.lib, 'test')
+        with StoreBuffer(self.lib, batch_size=2, interval=0) as buffer:
+            buffer.change_hooks.append(journal.record)
+            buffer.flush_hooks.append(journal.write)
+            for item, value in zip(self.items, values):
+                buffer.add(item, {'title_short': value})
+        return journal
+
+    def test_undo_buffered_run(self):
+        journal = self.run_buffered(['New 0', 'New 1', 'New 2'])
+        self.assertEqual(3, journal.count)
+        self.assertEqual(['New 0', 'New 1', 'New 2'], self.short_titles())
+
+        self.assertEqual((3, 0), RunJournal.undo(self.lib, journal.run_id))
+        self.assertEqual(['Old', None, None], self.short_titles())
+        with self.assertRaises(UserError):
+            RunJournal.undo(self.lib, journal.run_id)
+
+    def test_undo_keeps_later_changes(self):
+        journal = self.run_buffered(['New 0', 'New 1'])
+        later = self.lib.get_item(2)
+        later['title_short'] = 'Edited'
+        later.store()
+        self.assertEqual((1, 1), RunJournal.undo(self.lib, journal.run_id))
+        self.assertEqual(['Old', 'Edited', None], self.short_titles())
+
+    def test_undo_applied_plan(self):
+        journal = RunJournal(self.lib, 'plan')
+        entries = [
+            PlanEntry(item_id, title, title, 5, short_title)
+            for item_id, title, short_title in [(1, 'Long title 0', 'Plan 0'), (3, 'Long title 2', 'Plan 2'),
+                                                (99, 'Gone', 'Gone')]
+        ]
+        self.assertEqual((2, 1), apply_plan(self.lib, entries, journal=journal))
+        self.assertEqual(2, journal.count)
+        self.assertEqual((2, 0), RunJournal.undo(self.lib, journal.run_id))
+        self.assertEqual(['Old', None, None], self.short_titles())
+
+    def test_empty_run_not_recorded(self):
+        journal = self.run_buffered([])
+        self.assertIsNone(journal.run_id)
+        with self.assertRaises(UserError):
+            RunJournal.undo(self.lib, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
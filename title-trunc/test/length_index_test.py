@@ -0,0 +1,48 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import gc
+import unittest
+from unittest import mock
+
+from beets.library import Library
+
+from beetsplug.title_trunc import length_index
+from beetsplug.title_trunc.length_index import drop_length_index, ensure_length_index, length_index_name
+from test.helper import TempDirMixin
+
+
+class LengthIndexTest(TempDirMixin, unittest.TestCase):
+    def has_index(self, library: Library) -> bool:
+        with library.transaction() as tx:
+            return bool(tx.query("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+                                 (length_index_name('title'),)))
+
+    def test_created_once_per_library(self):
+        library = Library(self.tmp_path('library.db'))
+        self.assertTrue(ensure_length_index(library))
+        self.assertTrue(self.has_index(library))
+        with mock.patch.object(library, 'transaction', side_effect=AssertionError):
+            self.assertTrue(ensure_length_index(library))
+        drop_length_index(library)
+        self.assertTrue(ensure_length_index(library))
+        self.assertTrue(self.has_index(library))
+
+    def test_collected_library_forgotten(self):
+        # Otherwise a new library could get the collected one's id and skip its index
+        known = len(length_index._ensured)
+        library = Library(self.tmp_path('library.db'))
+        ensure_length_index(library)
+        self.assertEqual(known + 1, len(length_index._ensured))
+        library._connection().close()
+        del library
+        gc.collect()
+        self.assertEqual(known, len(length_index._ensured))
+
+    def test_flexible_field_not_indexed(self):
+        self.assertFalse(ensure_length_index(Library(self.tmp_path('library.db')), 'title_short'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.dbcore.query import AndQuery, OrQuery
+from beets.library import Item
+
+from beetsplug.title_trunc.length_query import (
+    LengthQuery, OverMaxLengthQuery, WithinMaxLengthQuery, FlexOverMaxLengthQuery
+)
+from test.helper import LibraryMixin
+
+
+class FlexOverMaxLengthQueryTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        for title, title_short in [
+            ('A long title that needs work', None),
+            ('A long title already done', 'Done'),
+            ('A long title done badly', 'Still far too long'),
+            ('A long title with empty short', ''),
+            ('Short', None),
+        ]:
+            item = Item(title=title)
+            if title_short is not None:
+                item['title_short'] = title_short
+            self.lib.add(item)
+
+    def test_sql_excludes_done_items(self):
+        query = AndQuery([
+            OverMaxLengthQuery('title', '10'),
+            FlexOverMaxLengthQuery('title_short', '10'),
+        ])
+        titles = sorted(item.title for item in self.lib.items(query))
+        self.assertEqual([
+            'A long title done badly',
+            'A long title that needs work',
+            'A long title with empty short',
+        ], titles)
+
+    def test_match_agrees_with_sql(self):
+        query = FlexOverMaxLengthQuery('title_short', '10')
+        sql_ids = {item.id for item in self.lib.items(query)}
+        py_ids = {item.id for item in self.lib.items() if query.match(item)}
+        self.assertEqual(sql_ids, py_ids)
+
+
+class LengthQueryTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        for title, title_short in [
+            ('', None),
+            ('Ten chars!', 'Short'),
+            ('Eleven char', ''),
+            ('A title well over the limit', 'Still far too long'),
+        ]:
+            item = Item(title=title)
+            if title_short is not None:
+                item['title_short'] = title_short
+            self.lib.add(item)
+        self.items = list(self.lib.items())
+
+    def assertAgrees(self, query):
+        sql_ids = sorted(item.id for item in self.lib.items(query))
+        py_ids = sorted(item.id for item in self.items if query.match(item))
+        many_ids = sorted(item.id for item in query.filter_many(self.items))
+        self.assertEqual(sql_ids, py_ids, query)
+        self.assertEqual(sql_ids, many_ids, query)
+        return sql_ids
+
+    def test_over_max_length(self):
+        ids = self.assertAgrees(OverMaxLengthQuery('title', '10'))
+        self.assertEqual([3, 4], ids)
+
+    def test_within_max_length(self):
+        ids = self.assertAgrees(WithinMaxLengthQuery('title', '10'))
+        self.assertEqual([1, 2], ids)
+
+    def test_ranges(self):
+        for pattern in ['10', '..10', '11..', '5..20', '0']:
+            for field in ['title', 'title_short']:
+                self.assertAgrees(LengthQuery(field, pattern))
+
+    def test_flex_field_skips_missing_values(self):
+        ids = self.assertAgrees(WithinMaxLengthQuery('title_short', '10'))
+        self.assertEqual([2, 3], ids)
+
+    def test_slow_path_inside_or(self):
+        query = OrQuery([OverMaxLengthQuery('title', '20'), LengthQuery('title', '0')])
+        sql_ids = sorted(item.id for item in self.lib.items(query))
+        py_ids = sorted(item.id for item in self.items if query.match(item))
+        self.assertEqual([1, 4], sql_ids)
+        self.assertEqual(sql_ids, py_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
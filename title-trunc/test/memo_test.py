@@ -0,0 +1,53 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+from time import time
+
+
+from beetsplug.title_trunc.memo import DecisionMemo
+from test.helper import LibraryMixin
+
+
+class DecisionMemoTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+
+    def _remember(self, length, entries):
+        memo = DecisionMemo(self.lib, length)
+        for title, short_title in entries.items():
+            memo.remember(title, short_title)
+        with self.lib.transaction() as tx:
+            memo.write(tx)
+
+    def test_remembered_across_runs(self):
+        self._remember(50, {'A long title': 'Long', 'Another title': 'Another'})
+        memo = DecisionMemo(self.lib, 50)
+        self.assertEqual('Long', memo.get('A long title'))
+        self.assertIn('Another title', memo)
+        self.assertIsNone(DecisionMemo(self.lib, 40).get('A long title'))
+
+    def test_prune_by_size(self):
+        self._remember(50, {'Title {}'.format(i): 'T{}'.format(i) for i in range(10)})
+        with self.lib.transaction() as tx:
+            tx.mutate('UPDATE {} SET used = ? WHERE title = ?'.format(DecisionMemo.table), (time() + 60, 'Title 3'))
+        self.assertEqual(6, DecisionMemo.prune(self.lib, max_size=4))
+        entries = list(DecisionMemo.entries_of(self.lib))
+        self.assertEqual(4, len(entries))
+        self.assertEqual('Title 3', entries[0][0])
+
+    def test_prune_by_age(self):
+        self._remember(50, {'Old': 'O', 'New': 'N'})
+        with self.lib.transaction() as tx:
+            tx.mutate('UPDATE {} SET used = ? WHERE title = ?'.format(DecisionMemo.table), (time() - 10 * 86400, 'Old'))
+        self.assertEqual(1, DecisionMemo.prune(self.lib, max_age=5))
+        self.assertEqual(['New'], [entry[0] for entry in DecisionMemo.entries_of(self.lib)])
+
+    def test_entries_filter(self):
+        self._remember(50, {'Symphony': 'S', 'Concerto': 'C'})
+        self.assertEqual(['Concerto'], [entry[0] for entry in DecisionMemo.entries_of(self.lib, 'cert')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import os
+import unittest
+from unittest import mock
+
+from beets.library import Item
+
+from beetsplug.title_trunc.path_budget import PathBudget, field_component
+from beetsplug.title_trunc.select_trunc import SelectTrunc
+from test.helper import LibraryMixin
+
+
+class PathBudgetTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.lib.path_formats = [
+            ('default', '$albumartist/$album/$track $title_short'),
+            ('singleton:true', 'Singles/$artist - ${title_short}'),
+        ]
+        self.item = Item(title='A title', artist='Artist', path=b'/music/file.FLAC')
+        self.lib.add(self.item)
+
+    def destination_size(self, title_short: str) -> int:
+        self.item['title_short'] = title_short
+        return len(os.path.basename(self.item.destination(relative_to_libdir=True)))
+
+    def test_field_component(self):
+        self.assertEqual('$track $title_short', field_component('$album/$track $title_short', 'title_short'))
+        self.assertEqual('$title', field_component('$title/$title_short', 'title'))
+        self.assertIsNone(field_component('$album/$title', 'title_short'))
+
+    def test_sizes_match_destination(self):
+        budget = PathBudget(self.lib, 255).for_item(self.item)
+        titles = ['Short', 'Op․ 15∶ I․ Allegro…', 'With/slash', 'Trailing dot.']
+        self.assertEqual([self.destination_size(title) for title in titles], budget.sizes(titles))
+
+    def test_char_limit(self):
+        budget = PathBudget(self.lib, 30).for_item(self.item)
+        # 'Artist - ' and '.flac' leave 16 bytes, 5 multi-byte characters
+        self.assertEqual(5, budget.char_limit('∶' * 20))
+        self.assertEqual(4, budget.char_limit('∶' * 20, '…'))
+        self.assertEqual(16, budget.char_limit('x' * 20))
+
+    def test_no_budget_without_field(self):
+        self.lib.path_formats = [('default', '$album/$title')]
+        self.assertIsNone(PathBudget(self.lib, 30).for_item(self.item))
+
+    def test_select_trunc_keeps_candidates_within_budget(self):
+        self.item['title_short'] = 'Concerto No. 1'
+        budget = PathBudget(self.lib, 40).for_item(self.item)
+        title = 'Concerto No. 1 in C major, Op. 15: I. Allegro con brio'
+        selector = SelectTrunc(self.item, self.lib, 75, title=title, budget=budget).prepare()
+        self.assertTrue(selector.options)
+        for option in selector.options:
+            self.assertLessEqual(budget.size(option.title), 40, option.title)
+        # The existing title keeps key 0, the others are numbered without gaps
+        self.assertEqual('existing', selector.option_rules[0])
+        self.assertEqual(list(range(len(selector.options))), [option.pos for option in selector.options])
+
+    def test_select_trunc_sizes_candidates_at_once(self):
+        budget = PathBudget(self.lib, 40).for_item(self.item)
+        title = 'Concerto No. 1 in C major, Op. 15: I. Allegro con brio'
+        selector = SelectTrunc(self.item, self.lib, 75, title=title, budget=budget)
+        with mock.patch.object(budget, 'sizes', wraps=budget.sizes) as sizes:
+            selector.prepare()
+        self.assertEqual(1, sizes.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
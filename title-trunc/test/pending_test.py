@@ -0,0 +1,67 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.dbcore.query import AndQuery
+from beets.library import Item
+
+from beetsplug.title_trunc.length_query import OverMaxLengthQuery, FlexOverMaxLengthQuery
+from beetsplug.title_trunc.pending import PendingItems, PendingQuery
+from test.helper import LibraryMixin
+
+
+class PendingItemsTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.pending = PendingItems(10)
+        self.items = [Item(title=title) for title in ['A long title', 'Short', 'Another long title']]
+        for item in self.items:
+            self.lib.add(item)
+
+    def pending_ids(self) -> list[int]:
+        return sorted(item.id for item in self.lib.items(PendingQuery(self.lib)))
+
+    def test_consider_and_flush(self):
+        for item in self.items:
+            self.pending.consider(item, self.lib)
+        self.assertEqual(2, self.pending.flush())
+        self.assertEqual([1, 3], self.pending_ids())
+        self.assertEqual(2, PendingItems.count(self.lib))
+
+    def test_shortened_item_is_dropped(self):
+        for item in self.items:
+            self.pending.consider(item, self.lib)
+        self.pending.flush()
+        self.items[0]['title_short'] = 'Long'
+        self.pending.consider(self.items[0])
+        self.pending.flush()
+        self.assertEqual([3], self.pending_ids())
+
+    def test_flushes_every_batch(self):
+        pending = PendingItems(10, batch_size=2)
+        pending.consider(self.items[0], self.lib)
+        pending.consider(self.items[2], self.lib)
+        self.assertEqual(([], []), (list(pending.added), list(pending.dropped)))
+        self.assertEqual([1, 3], self.pending_ids())
+
+    def test_prune(self):
+        for item in self.items:
+            self.pending.consider(item, self.lib)
+        self.pending.flush()
+        self.items[2]['title_short'] = 'Another'
+        self.items[2].store()
+        query = AndQuery([OverMaxLengthQuery('title', '10'), FlexOverMaxLengthQuery('title_short', '10')])
+        self.assertEqual(1, PendingItems.prune(self.lib, query))
+        self.assertEqual([1], self.pending_ids())
+
+    def test_match_agrees_with_sql(self):
+        self.pending.consider(self.items[0], self.lib)
+        self.pending.flush()
+        query = PendingQuery(self.lib)
+        self.assertEqual([1], [item.id for item in self.lib.items() if query.match(item)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import json
+import os
+import unittest
+
+from beets.library import Item
+from beets.ui import UserError
+from confuse import ConfigSource, RootView, load_yaml
+
+from beetsplug import title_trunc
+from beetsplug.title_trunc.command import TitleTruncCommand
+from beetsplug.title_trunc.memo import DecisionMemo
+from beetsplug.title_trunc.pending import PendingItems
+from beetsplug.title_trunc.plan import PlanEntry, PlanWriter, apply_plan, read_plan
+from test.helper import LibraryMixin
+
+
+class PlanTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.plan_path = self.tmp_path('plan.jsonl')
+        self.items = [Item(title='Long title {}'.format(index)) for index in range(3)]
+        for item in self.items:
+            self.lib.add(item)
+        self.items[0]['title_short'] = 'Old'
+        self.items[0].store()
+
+    def test_write_then_apply(self):
+        with PlanWriter(self.plan_path, 7) as plan:
+            plan.write(self.items[0], 'Long title 0', ['Long…', 'Title 0'], ['ellipsis_end', 'separator_tail'],
+                       'Title 0', 'separator_tail')
+            plan.write(self.items[1], 'Long title 1', [], [], None, 'none')
+            plan.write(self.items[2], 'Long title 2', ['Title 2'], ['colon_tail'], 'Title 2', 'colon_tail')
+        self.assertEqual(3, plan.count)
+        with open(self.plan_path, encoding='utf-8') as plan_file:
+            first = json.loads(plan_file.readline())
+        self.assertEqual('Old', first['title_short'])
+        self.assertEqual({'title': 'Long…', 'rule': 'ellipsis_end'}, first['candidates'][0])
+
+        self.assertEqual(7, first['length'])
+        self.assertEqual([
+            PlanEntry(1, 'Long title 0', 'Long title 0', 7, 'Title 0'),
+            PlanEntry(3, 'Long title 2', 'Long title 2', 7, 'Title 2'),
+        ], list(read_plan(self.plan_path)))
+        self.assertEqual((2, 0), apply_plan(self.lib, read_plan(self.plan_path)))
+        self.assertEqual(
+            ['Title 0', None, 'Title 2'],
+            [item.get('title_short') for item in self.lib.items()]
+        )
+
+    def entry(self, item_id: int, short_title: str, title: str | None = None) -> PlanEntry:
+        title = title or 'Long title {}'.format(item_id - 1)
+        return PlanEntry(item_id, title, title, 7, short_title)
+
+    def test_apply_skips_missing_items(self):
+        self.assertEqual((1, 1), apply_plan(self.lib, [self.entry(2, 'Short'), self.entry(99, 'Gone')]))
+        self.assertEqual('Short', self.lib.get_item(2).get('title_short'))
+
+    def test_apply_skips_retitled_items(self):
+        retitled = self.lib.get_item(2)
+        retitled.title = 'Another long title'
+        retitled.store()
+        self.assertEqual((1, 1), apply_plan(self.lib, [self.entry(2, 'Stale'), self.entry(3, 'Short')]))
+        self.assertEqual([None, 'Short'], [self.lib.get_item(item_id).get('title_short') for item_id in (2, 3)])
+
+    def test_apply_updates_memo_and_pending(self):
+        PendingItems.create_table(self.lib)
+        with self.lib.transaction() as tx:
+            tx.mutate_many('INSERT INTO {} (item_id, queued) VALUES (?, 0)'.format(PendingItems.table),
+                           [(2,), (3,)])
+        self.assertEqual((1, 0), apply_plan(self.lib, [self.entry(2, 'Short')], memo=True))
+        self.assertEqual('Short', DecisionMemo(self.lib, 7).get('Long title 1'))
+        with self.lib.transaction() as tx:
+            self.assertEqual([(3,)], [tuple(row) for row in tx.query(
+                'SELECT item_id FROM {}'.format(PendingItems.table))])
+
+    def test_invalid_line(self):
+        with open(self.plan_path, 'w', encoding='utf-8') as plan_file:
+            plan_file.write('{"chosen": "No id"}\n')
+        with self.assertRaises(UserError):
+            list(read_plan(self.plan_path))
+
+    def schema(self) -> list[str]:
+        with self.lib.transaction() as tx:
+            return sorted(row[0] for row in tx.query('SELECT name FROM sqlite_master'))
+
+    def test_plan_mode_does_not_write(self):
+        config_path = os.path.join(os.path.dirname(title_trunc.__file__), 'config_default.yml')
+        command = TitleTruncCommand(RootView([ConfigSource(load_yaml(config_path), config_path)]))
+        schema = self.schema()
+        for extra in ([], ['--pending']):
+            options, arguments = command.parser.parse_args(['--plan', self.plan_path, '-l', '5'] + extra)
+            command.func(self.lib, options, arguments)
+            self.assertEqual(schema, self.schema())
+        # Without a pending table nothing is pending, so only the first run wrote the plan
+        self.assertEqual([2, 3], [entry.id for entry in read_plan(self.plan_path)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import threading
+import unittest
+
+from beetsplug.title_trunc.prefetch import Prefetcher
+
+
+class PrefetcherTest(unittest.TestCase):
+    def test_ordered(self):
+        with Prefetcher(range(1, 50), lambda value: value * 2, ahead=5, workers=3) as prefetcher:
+            self.assertEqual([(value, value * 2) for value in range(1, 50)], list(prefetcher))
+
+    def test_runs_ahead_in_background(self):
+        prepared = []
+        started = threading.Event()
+
+        def prepare(value):
+            prepared.append(value)
+            if len(prepared) == 3:
+                started.set()
+            return value
+
+        with Prefetcher(range(1, 10), prepare, ahead=3) as prefetcher:
+            iterator = iter(prefetcher)
+            self.assertEqual((1, 1), next(iterator))
+            self.assertTrue(started.wait(1))
+            self.assertEqual([1, 2, 3], prepared[:3])
+
+    def test_close_cancels_pending(self):
+        prepared = []
+        with self.assertRaises(SystemExit):
+            with Prefetcher(range(1, 100), prepared.append, ahead=4) as prefetcher:
+                for _ in prefetcher:
+                    exit(1)
+        self.assertLessEqual(len(prepared), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.library import Item
+
+from beetsplug.title_trunc.select_trunc import SelectTrunc
+
+
+title = 'Concerto No. 1 in C major, Op. 15: I. Allegro con brio (Live)'
+
+
+class SelectTruncTest(unittest.TestCase):
+    def test_basic(self):
+        selector = SelectTrunc(
+            Item(title='This is the end of the world as we know it', title_short='End of the World'), None, 20
+        ).prepare()
+        self.assertEqual([
+            'End of the World',
+            'This is the end of …',
+            'This is … know it',
+        ], [option.title for option in selector.options])
+        self.assertEqual(['existing', 'ellipsis_end', 'ellipsis_middle'], selector.option_rules)
+        self.assertEqual([0, 1, 2], [option.pos for option in selector.options])
+
+    def test_colons(self):
+        selector = SelectTrunc(Item(title='This is: the end of: the world (as we know it)'), None, 20).prepare()
+        self.assertEqual([
+            'This is∶ the end …',
+            'This is∶ … know it)',
+            'This is∶ the end of',
+            'This is∶ the end of',
+        ], [option.title for option in selector.options])
+
+    def test_short_title_needs_no_options(self):
+        selector = SelectTrunc(Item(title='Short'), None, 40)
+        self.assertEqual('Short', selector.get_short_title())
+        self.assertEqual([], selector.options)
+
+    def test_static_lists_are_shared(self):
+        first = SelectTrunc(Item(title=title), None, 40)
+        second = SelectTrunc(Item(title=title), None, 50)
+        self.assertIs(first.main_commands, second.main_commands)
+        self.assertIs(first.separators, second.separators)
+        self.assertFalse(hasattr(first, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
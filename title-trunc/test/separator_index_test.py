@@ -0,0 +1,33 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beetsplug.title_trunc.separator_index import SeparatorIndex
+
+
+class SeparatorIndexTest(unittest.TestCase):
+    def setUp(self):
+        # Separators at 1, 4, 7, 10 and 13
+        self.index = SeparatorIndex('A∶B – C∶D ⁄ E∶F', ('–', '∶', '⁄'))
+
+    def test_positions(self):
+        self.assertEqual([1, 4, 7, 10, 13], self.index.positions)
+        self.assertEqual([1, 7, 13], self.index.by_separator['∶'])
+
+    def test_last_before(self):
+        self.assertEqual(7, self.index.last_before(10))
+        self.assertEqual(10, self.index.last_before(11))
+        self.assertEqual(7, self.index.last_before(12, '∶'))
+        self.assertEqual(-1, self.index.last_before(1))
+
+    def test_first_from(self):
+        self.assertEqual(4, self.index.first_from(2))
+        self.assertEqual(7, self.index.first_from(2, '∶'))
+        self.assertEqual(-1, self.index.first_from(14))
+        self.assertEqual(-1, self.index.first_from(0, '？'))
+
+
+if __name__ == '__main__':
+    unittest.main()
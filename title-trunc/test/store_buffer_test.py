@@ -0,0 +1,43 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beets.library import Item
+
+from beetsplug.title_trunc.store_buffer import StoreBuffer
+from test.helper import LibraryMixin
+
+
+class StoreBufferTest(LibraryMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = []
+        for i in range(5):
+            item = Item(title='Title {}'.format(i))
+            self.lib.add(item)
+            self.items.append(item)
+
+    def _stored_short_titles(self):
+        return [self.lib.get_item(item.id).get('title_short') for item in self.items]
+
+    def test_flush_on_batch_size(self):
+        buffer = StoreBuffer(self.lib, batch_size=3, interval=0)
+        for item in self.items[:2]:
+            buffer.add(item, {'title_short': 'short'})
+        self.assertEqual([None] * 5, self._stored_short_titles())
+        buffer.add(self.items[2], {'title_short': 'short'})
+        self.assertEqual(0, len(buffer))
+        self.assertEqual(['short'] * 3 + [None] * 2, self._stored_short_titles())
+
+    def test_flush_on_exit(self):
+        with self.assertRaises(SystemExit):
+            with StoreBuffer(self.lib, batch_size=100, interval=0) as buffer:
+                buffer.add(self.items[0], {'title_short': 'short'})
+                exit(1)
+        self.assertEqual('short', self._stored_short_titles()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
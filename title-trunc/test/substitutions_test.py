@@ -0,0 +1,29 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import unittest
+
+from beetsplug.title_trunc.substitutions import Substitutions, compile_substitutions, default_substitutions
+
+
+class SubstitutionsTest(unittest.TestCase):
+    def test_default_rules_chain(self):
+        substitutions = default_substitutions()
+        self.assertEqual('Symphony #5 in C minor, Op․ 67∶ I․ Allegro con brio',
+                         substitutions.apply('Symphony No. 5 in C minor, Op. 67: I. Allegro con brio'))
+        self.assertEqual('A ⁄ B', substitutions.apply('A/B'))
+        self.assertEqual('A B', substitutions.apply('A     B'))
+
+    def test_rules_run_in_order(self):
+        self.assertEqual('c', Substitutions((('a', 'b'), ('b', 'c'))).apply('a'))
+        self.assertEqual('b', Substitutions((('b', 'c'), ('a', 'b'))).apply('a'))
+
+    def test_compiled_once(self):
+        rules = (('a', 'b'),)
+        self.assertIs(compile_substitutions(rules), compile_substitutions(rules))
+        self.assertIs(default_substitutions(), default_substitutions())
+
+
+if __name__ == '__main__':
+    unittest.main()
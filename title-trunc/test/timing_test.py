@@ -0,0 +1,56 @@
+#  Copyright (c) 2023
+#  Author: Scott Yeskie
+#  License: See LICENSE.txt
+
+import json
+import os
+import tempfile
+import unittest
+
+from beetsplug.title_trunc.timing import Timings, percentile, profiled, timings
+
+
+class TimingsTest(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(50.0, percentile(values, 0.5))
+        self.assertEqual(95.0, percentile(values, 0.95))
+        self.assertEqual(7.0, percentile([7.0], 0.95))
+        self.assertEqual(0.0, percentile([], 0.5))
+
+    def test_timed_and_timer(self):
+        run = Timings()
+
+        @run.timer('double')
+        def double(value):
+            return value * 2
+
+        self.assertEqual(4, double(2))
+        with self.assertRaises(ValueError):
+            with run.timed('failing'):
+                raise ValueError()
+        run.count_item(3)
+
+        stats = run.stats()
+        self.assertEqual(3, stats['items'])
+        self.assertEqual({'double', 'failing'}, set(stats['steps']))
+        self.assertEqual(1, stats['steps']['failing']['count'])
+        self.assertEqual(3, len(run.summary()))
+
+    def test_profiled_json(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'trace.json')
+            timings.reset()
+            self.assertEqual(3, profiled(path, timings.timer('add')(lambda a, b: a + b), 1, 2))
+            with open(path, encoding='utf-8') as trace_file:
+                self.assertEqual(1, json.load(trace_file)['steps']['add']['count'])
+
+    def test_profiled_cprofile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'run.prof')
+            profiled(path, sum, [1, 2])
+            self.assertTrue(os.path.getsize(path) > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()